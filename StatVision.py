@@ -1,28 +1,41 @@
 import os
+import re
+import json
+import hashlib
+import mimetypes
+import threading
 import vertexai
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
-import matplotlib.pyplot as plt
 from PIL import Image
 import streamlit as st
 import statsapi
-from pybaseball import playerid_lookup, statcast_batter
 from google.oauth2 import service_account
-from vertexai.generative_models import GenerativeModel, Part, SafetySetting
+from vertexai.generative_models import GenerationConfig, GenerativeModel, Part, SafetySetting
+import result_cache
+import single_flight
+import tracing
+from llm_client import LLMClient
+from statcast_frames import load_compact_statcast, widen_floats
+from statcast_metrics import comparison_table
+from statcast_plots import render_metric_png
+from player_index import resolve_player, resolve_players
+from video_segments import (SEGMENT_OVERLAP, SEGMENT_SECONDS, format_timestamp, merge_player_names,
+                            merge_segment_rows, segment_windows, video_duration)
 
 # Constants
 PROJECT_ID = "mlbhackathon2025"
 BUCKET_NAME = "mlbhackathon"
 MAX_RETRIES = 3
 DEFAULT_IMAGE = "StatVision.jpg"
+MODEL_NAME = "gemini-1.5-pro-002"
+STATCAST_START_DATE = "2023-01-21"  # default start of the Statcast window; the window ends today by default
+FETCH_WORKERS = 8  # bounded pool shared by all per-player source fetches
 
-# Service account initialization
-key_file_path = os.path.join(os.getcwd(), 'sa.json')
-credentials = service_account.Credentials.from_service_account_file(key_file_path)
-os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = key_file_path
+_model = None
+_model_lock = threading.Lock()
 
-# Model initialization
-vertexai.init(project=PROJECT_ID, location="us-central1")
-model = GenerativeModel("gemini-1.5-pro-002")
+_fetch_pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="statvision-fetch")
 
 SAFETY_SETTINGS = {
     SafetySetting.HarmCategory.HARM_CATEGORY_HATE_SPEECH: SafetySetting.HarmBlockThreshold.BLOCK_ONLY_HIGH,
@@ -49,147 +62,601 @@ Format response as Markdown table with columns:
 |-----------------|--------|-------|------------------------|---------------|
 """
 
+# Structured analysis: one JSON response carrying both the metric rows and the players
+ANALYSIS_COLUMNS = {
+    "timestamp_range": "Timestamp Range",
+    "metric": "Metric",
+    "value": "Value",
+    "identification_method": "Identification Method",
+    "play_analysis": "Play Analysis",
+}
 
-def get_player_stats(player_name: str):
-    """Get comprehensive player stats using pybaseball and MLB API"""
-    try:
-        # Use MLB API first to get the correct full name
-        mlb_data = statsapi.lookup_player(player_name)
-        if not mlb_data:
-            st.error(f"No player found for {player_name}")
-            return None
-
-        full_name = mlb_data[0]['fullName']
-        name_parts = full_name.split()
-
-        # Handle cases where player has only one name
-        first = name_parts[0]
-        last = name_parts[1] if len(name_parts) > 1 else ""
-
-        # Use pybaseball lookup
-        pb_data = playerid_lookup(last, first)
-        if pb_data.empty:
-            st.warning(f"No Statcast data available for {full_name}")
-            return None
-
-        player_id = pb_data.iloc[0]['key_mlbam']
-        statcast_data = statcast_batter('2023-01-21', pd.Timestamp.today().strftime('%Y-%m-%d'), player_id)
-
-        # Fetch MLB season stats
-        mlb_stats = statsapi.player_stat_data(
-            mlb_data[0]['id'],
-            group="hitting",
-            type="season"
-        )
+ANALYSIS_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "metrics": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {field: {"type": "STRING"} for field in ANALYSIS_COLUMNS},
+                "required": list(ANALYSIS_COLUMNS),
+            },
+        },
+        "players": {"type": "ARRAY", "items": {"type": "STRING"}},
+    },
+    "required": ["metrics", "players"],
+}
+
+STRUCTURED_ANALYSIS_PROMPT = ANALYSIS_PROMPT.split("Format response as")[0] + """Respond with JSON only:
+- "metrics": one object per metric occurrence with the fields timestamp_range, metric, value,
+  identification_method and play_analysis
+- "players": the full names of every player involved in the plays above
+"""
+
+SEGMENT_PROMPT_NOTE = """
+This clip is one segment of a longer video. Give every timestamp relative to the start of this
+segment, which is 00:00:00. If the segment is empty because it starts after the end of the video,
+return empty "metrics" and "players" lists.
+"""
 
-        return {
-            'statcast': statcast_data,
-            'mlb_stats': mlb_stats,
-            'player_info': {
-                'name': full_name,
-                'id': player_id,
-                'position': mlb_data[0]['primaryPosition']['abbreviation']
-            }
+STRUCTURED_GENERATION_CONFIG = {
+    "max_output_tokens": 8192,
+    "temperature": 0.3,
+    "top_p": 0.95,
+    "response_mime_type": "application/json",
+    "response_schema": ANALYSIS_SCHEMA,
+}
+TRANSLATION_GENERATION_CONFIG = {
+    "max_output_tokens": 8192,
+    "temperature": 0.3,
+    "top_p": 0.95,
+}
+TRANSLATION_WORKERS = 4
+TRANSLATION_BATCH_ROWS = 8  # finished rows sent together in one translation call
+
+
+def get_model() -> GenerativeModel:
+    """Return the process-wide Gemini client, initializing credentials and Vertex AI on first use"""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                # Prefer the bundled service account key, otherwise fall back to application default credentials
+                key_file_path = os.path.join(os.getcwd(), 'sa.json')
+                credentials = None
+                if os.path.exists(key_file_path):
+                    credentials = service_account.Credentials.from_service_account_file(key_file_path)
+                    os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = key_file_path
+                vertexai.init(project=PROJECT_ID, location="us-central1", credentials=credentials)
+                _model = GenerativeModel(MODEL_NAME)
+    return _model
+
+
+# Shared by every model call in the process: backoff, in-flight limit and per-call timeout
+_llm = LLMClient(get_model, max_retries=MAX_RETRIES)
+
+
+@tracing.traced("statcast")
+@single_flight.shared("player_statcast")
+def _load_player_statcast(player_id, start_date, end_date):
+    # Only the columns the page and risk analysis read, in compact dtypes
+    return load_compact_statcast(player_id, start_date, end_date)
+
+
+@tracing.traced("player_stat_data")
+@single_flight.shared("player_season_stats")
+def _load_season_stats(player_id):
+    return statsapi.player_stat_data(player_id, group="hitting", type="season")
+
+
+def _statcast_window(start_date=None, end_date=None):
+    """Normalize a Statcast date window to YYYY-MM-DD strings, defaulting to STATCAST_START_DATE through today"""
+    start = pd.Timestamp(start_date or STATCAST_START_DATE)
+    end = pd.Timestamp(end_date) if end_date else pd.Timestamp.today()
+    if start > end:
+        raise ValueError(f"Statcast window starts after it ends: {start:%Y-%m-%d} > {end:%Y-%m-%d}")
+    return start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
+
+
+def _submit_player_fetch(player, start_date=None, end_date=None):
+    """Start a resolved player's Statcast and MLB API fetches on the shared pool.
+
+    Both sources go through the single-flight layer, so sessions asking for the same
+    player and window at the same time share one download.
+    """
+    start, end = _statcast_window(start_date, end_date)
+    statcast_future = _fetch_pool.submit(tracing.propagate(_load_player_statcast), player['mlbam_id'], start, end)
+    stats_future = _fetch_pool.submit(tracing.propagate(_load_season_stats), player['mlb_id'])
+    return statcast_future, stats_future
+
+
+def _player_stats_result(player, statcast_future, stats_future):
+    return {
+        'statcast': statcast_future.result(),
+        'mlb_stats': stats_future.result(),
+        'player_info': {
+            'name': player['name'],
+            'id': player['mlbam_id'],
+            'position': player['position']
         }
+    }
+
+
+def fetch_player_stats(player_name: str, start_date=None, end_date=None):
+    """Fetch a player's Statcast and season stats, fetching both sources concurrently.
+
+    The Statcast window defaults to STATCAST_START_DATE through today. Raises LookupError
+    when the name does not resolve to a player.
+    """
+    with tracing.span("resolve_player"):
+        player = resolve_player(player_name)
+    if not player:
+        raise LookupError(f"No player found for {player_name}")
+    return _player_stats_result(player, *_submit_player_fetch(player, start_date, end_date))
+
+
+def fetch_players_stats(player_names, start_date=None, end_date=None):
+    """Fetch several players at once, yielding (name, player_data, error) as each player completes"""
+    names = [name.strip() for name in player_names if name.strip()]
+    pending = {}
+    seen_ids = set()
+
+    with tracing.span("resolve_players", players=len(names)):
+        players = resolve_players(names)
+
+    for name, player in players.items():
+        if not player:
+            yield name, None, LookupError(f"No player found for {name}")
+            continue
+        if player['mlb_id'] in seen_ids:
+            continue
+        seen_ids.add(player['mlb_id'])
+        futures = _submit_player_fetch(player, start_date, end_date)
+        for future in futures:
+            pending[future] = (name, player, futures)
+
+    completed = set()
+    for future in as_completed(pending):
+        name, player, futures = pending[future]
+        if name in completed or not all(f.done() for f in futures):
+            continue
+        completed.add(name)
+        try:
+            yield name, _player_stats_result(player, *futures), None
+        except Exception as e:
+            yield name, None, e
 
+
+def get_player_stats(player_name: str, start_date=None, end_date=None):
+    """Get comprehensive player stats using pybaseball and MLB API"""
+    try:
+        return fetch_player_stats(player_name, start_date, end_date)
+    except LookupError as e:
+        st.error(str(e))
+        return None
     except Exception as e:
         st.error(f"Error fetching player data: {str(e)}")
         return None
 
 
-def analyze_video(video_url: str) -> str:
-    """Analyze video and return formatted metrics analysis."""
-    video_part = Part.from_uri(mime_type="video/mp4", uri=video_url)
+def _validate_metric_row(row):
+    """Return a metric row with exactly the ANALYSIS_COLUMNS fields in order, whatever order the model used"""
+    if not isinstance(row, dict) or any(not isinstance(row.get(field), str) for field in ANALYSIS_COLUMNS):
+        raise ValueError(f"Invalid metric row: {row}")
+    return {field: row[field] for field in ANALYSIS_COLUMNS}
 
-    generation_config = {
-        "max_output_tokens": 8192,
-        "temperature": 0.3,
-        "top_p": 0.95,
-    }
 
-    for attempt in range(MAX_RETRIES):
-        try:
-            responses = model.generate_content(
-                [video_part, ANALYSIS_PROMPT],
-                generation_config=generation_config,
-                safety_settings=SAFETY_SETTINGS,
-                stream=True,
-            )
-            return "".join([chunk.text for chunk in responses])
-        except Exception as e:
-            if attempt == MAX_RETRIES - 1:
-                raise RuntimeError(f"Analysis failed after {MAX_RETRIES} attempts") from e
+def parse_structured_analysis(response_text: str):
+    """Validate a structured analysis response and return (metrics DataFrame, player names)"""
+    payload = json.loads(response_text)
+    if not isinstance(payload, dict):
+        raise ValueError("Structured analysis must be a JSON object")
 
+    metrics = payload.get("metrics")
+    players = payload.get("players")
+    if not isinstance(metrics, list) or not isinstance(players, list):
+        raise ValueError("Structured analysis must contain 'metrics' and 'players' lists")
 
-def translate_text(text: str, target_language: str = "English") -> str:
-    """ †ranslate using Gemini 1.5 Pro model"""
+    metrics = [_validate_metric_row(row) for row in metrics]
+    metrics_df = pd.DataFrame(
+        [[row[field] for field in ANALYSIS_COLUMNS] for row in metrics],
+        columns=list(ANALYSIS_COLUMNS.values()),
+    ).astype("string")
+    player_names = [name.strip() for name in players if isinstance(name, str) and name.strip()]
+    return metrics_df, player_names
+
+
+def _markdown_row(values) -> str:
+    return "| " + " | ".join(str(value).replace("|", "\\|").replace("\n", " ") for value in values) + " |"
+
+
+def _markdown_header(columns) -> str:
+    separator = "|" + "|".join("-" * (len(column) + 2) for column in columns) + "|"
+    return _markdown_row(columns) + "\n" + separator
 
-    generation_config = {
-        "max_output_tokens": 8192,
-        "temperature": 0.3,
-        "top_p": 0.95,
-    }
 
-    for attempt in range(MAX_RETRIES):
+def _markdown_cells(line: str):
+    """Number of cells of a "| a | b |" Markdown row, or None when the line is not one"""
+    line = line.strip()
+    if len(line) < 2 or not (line.startswith("|") and line.endswith("|")):
+        return None
+    return len(re.split(r"(?<!\\)\|", line)) - 2
+
+
+def checked_translation(translation: str, original_lines):
+    """Keep translated Markdown rows only where they line up with the originals.
+
+    The translation must have one row per original line (code fences aside) with the same
+    number of cells; otherwise the original line is shown, so a chatty reply or a merged
+    cell never breaks the table.
+    """
+    lines = [line.strip() for line in translation.strip().splitlines()
+             if line.strip() and not line.strip().startswith("```")]
+    if len(lines) != len(original_lines):
+        return list(original_lines)
+    return [line if _markdown_cells(line) is not None and _markdown_cells(line) == _markdown_cells(original)
+            else original for line, original in zip(lines, original_lines)]
+
+
+def metrics_to_markdown(metrics: pd.DataFrame) -> str:
+    """Render parsed metric rows as a Markdown table"""
+    lines = [_markdown_header(metrics.columns)]
+    lines += [_markdown_row(row) for row in metrics.itertuples(index=False)]
+    return "\n".join(lines)
+
+
+@tracing.traced("analyze_video_structured")
+@single_flight.shared("analyze_video_structured")
+def analyze_video_structured(video_url: str):
+    """Analyze video in a single call returning (metrics DataFrame, player names)"""
+    video_part = Part.from_uri(mime_type="video/mp4", uri=video_url)
+    generation_config = STRUCTURED_GENERATION_CONFIG
+
+    cache_key = result_cache.make_key(video_url, STRUCTURED_ANALYSIS_PROMPT, MODEL_NAME, generation_config)
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        return parse_structured_analysis(cached)
+
+    # Responses failing validation are retried like transport errors
+    response_text = _llm.generate_sync(
+        [video_part, STRUCTURED_ANALYSIS_PROMPT],
+        generation_config=GenerationConfig(**generation_config),
+        safety_settings=SAFETY_SETTINGS,
+        validate=parse_structured_analysis,
+        description="Analysis",
+    )
+    result_cache.put(cache_key, response_text)
+    return parse_structured_analysis(response_text)
+
+
+def _video_source(video: str):
+    """Return (Part fields, cache identity) for a video URI or a local sample file"""
+    mime_type = mimetypes.guess_type(video)[0] or "video/mp4"
+    if os.path.isfile(video):
+        with open(video, "rb") as f:
+            data = f.read()
+        return {"inline_data": {"mime_type": mime_type, "data": data}}, hashlib.sha256(data).hexdigest()
+    return {"file_data": {"mime_type": mime_type, "file_uri": video}}, video
+
+
+@tracing.traced("analyze_video_segmented")
+def analyze_video_segmented(video: str, duration_seconds: float = None, segment_seconds: int = SEGMENT_SECONDS,
+                            overlap_seconds: int = SEGMENT_OVERLAP, llm: LLMClient = None):
+    """Analyze a long video as concurrent time-window segments, returning (metrics DataFrame, player names).
+
+    video is a URI or a local file path; local files are sent inline, so they must fit in one
+    request. The length of a local MP4 or QuickTime file is read from the file and replaces
+    duration_seconds, which is required for URIs; a given length covers only that much of the
+    video. Segment timestamps are shifted to video time and rows seen by two overlapping
+    segments are kept once. Segments are cached separately, unless llm replaces the shared
+    client (for example with a local fake model).
+    """
+    use_cache = llm is None
+    llm = llm or _llm
+    source, identity = _video_source(video)
+    if os.path.isfile(video):
+        duration_seconds = video_duration(video) or duration_seconds
+    if not duration_seconds:
+        raise ValueError(f"The length of {video} is unknown; pass duration_seconds")
+    prompt = STRUCTURED_ANALYSIS_PROMPT + SEGMENT_PROMPT_NOTE
+    windows = segment_windows(duration_seconds, segment_seconds, overlap_seconds)
+
+    responses, missing, requests = {}, [], []
+    for start, end in windows:
+        cache_key = result_cache.make_key(identity, start, end, prompt, MODEL_NAME, STRUCTURED_GENERATION_CONFIG)
+        cached = result_cache.get(cache_key) if use_cache else None
+        if cached is not None:
+            responses[start] = cached
+            continue
+
+        video_part = Part.from_dict({
+            **source,
+            "video_metadata": {"start_offset": {"seconds": start}, "end_offset": {"seconds": end}},
+        })
+        missing.append((start, cache_key))
+        requests.append({
+            "contents": [video_part, prompt],
+            "generation_config": GenerationConfig(**STRUCTURED_GENERATION_CONFIG),
+            "safety_settings": SAFETY_SETTINGS,
+            "validate": parse_structured_analysis,
+            "description": f"Analysis of segment {format_timestamp(start)}",
+        })
+
+    for (start, cache_key), response_text in zip(missing, llm.generate_many_sync(requests)):
+        if use_cache:
+            result_cache.put(cache_key, response_text)
+        responses[start] = response_text
+
+    segments, name_lists = [], []
+    for start, _ in windows:
+        metrics, player_names = parse_structured_analysis(responses[start])
+        segments.append((start, [dict(zip(ANALYSIS_COLUMNS, row)) for row in metrics.itertuples(index=False)]))
+        name_lists.append(player_names)
+
+    rows = merge_segment_rows(segments)
+    metrics = pd.DataFrame(
+        [[row[field] for field in ANALYSIS_COLUMNS] for row in rows],
+        columns=list(ANALYSIS_COLUMNS.values()),
+    ).astype("string")
+    return metrics, merge_player_names(name_lists)
+
+
+def _parse_completed_rows(text: str, offset: int):
+    """Parse the metric objects completed in a partial JSON response after `offset`.
+
+    Returns (rows, next_offset); an offset of 0 means the metrics array has not opened yet.
+    """
+    rows = []
+    if offset == 0:
+        key = text.find('"metrics"')
+        bracket = text.find("[", key) if key >= 0 else -1
+        if bracket < 0:
+            return rows, 0
+        offset = bracket + 1
+
+    decoder = json.JSONDecoder()
+    while True:
+        while offset < len(text) and text[offset] in " \t\r\n,":
+            offset += 1
+        if offset >= len(text) or text[offset] != "{":
+            return rows, offset
         try:
-            responses = model.generate_content(
-                [text, f"Translate the text to {target_language}"],
-                generation_config=generation_config,
-                safety_settings=SAFETY_SETTINGS,
-                stream=True,
-            )
-            return "".join([chunk.text for chunk in responses])
-        except Exception as e:
-            if attempt == MAX_RETRIES - 1:
-                raise RuntimeError(f"Translation failed after {MAX_RETRIES} attempts") from e
+            row, offset_end = decoder.raw_decode(text, offset)
+        except ValueError:
+            return rows, offset
+        rows.append(_validate_metric_row(row))
+        offset = offset_end
 
 
-def get_player_names(analysis: str) -> str:
-    """Extract player names from analysis response"""
+def stream_structured_analysis(video_url: str):
+    """Stream a structured analysis, yielding ("metric", row) as each row completes and ("players", names) last"""
+    video_part = Part.from_uri(mime_type="video/mp4", uri=video_url)
+    generation_config = STRUCTURED_GENERATION_CONFIG
 
-    generation_config = {
-        "max_output_tokens": 8192,
-        "temperature": 0.0,
-        "top_p": 0.95,
-    }
+    cache_key = result_cache.make_key(video_url, STRUCTURED_ANALYSIS_PROMPT, MODEL_NAME, generation_config)
+    cached = result_cache.get(cache_key)
 
-    for attempt in range(MAX_RETRIES):
+    # Another session is already streaming this video: wait for its complete response instead,
+    # or stream it here if that session is closed before finishing
+    while cached is None:
+        future, leader = single_flight.flight.claim(cache_key)
+        if leader:
+            break
         try:
-            responses = model.generate_content(
-                [analysis,
-                 "Extract player names from the analysis in coma-separated format. Example: 'Mike Trout, Shohei Ohtani'"],
-                generation_config=generation_config,
-                safety_settings=SAFETY_SETTINGS,
-                stream=True,
-            )
-            return "".join([chunk.text for chunk in responses])
-        except Exception as e:
-            if attempt == MAX_RETRIES - 1:
-                raise RuntimeError(f"Failed after {MAX_RETRIES} attempts") from e
+            cached = future.result()
+        except single_flight.LeaderAbandoned:
+            continue
 
+    if cached is not None:
+        metrics, player_names = parse_structured_analysis(cached)
+        for row in metrics.itertuples(index=False):
+            yield "metric", dict(zip(ANALYSIS_COLUMNS, row))
+        yield "players", player_names
+        return
 
-def plot_statcast_data(data: pd.DataFrame, metric: str):
-    """Generate visualization for statcast metrics"""
-    plt.figure(figsize=(10, 6))
+    try:
+        text = yield from _stream_structured_rows(video_part, generation_config)
+        _, player_names = parse_structured_analysis(text)
+    except BaseException as e:
+        single_flight.flight.finish(cache_key, error=e)
+        raise
+    single_flight.flight.finish(cache_key, text)
+    result_cache.put(cache_key, text)
+    yield "players", player_names
+
+
+def _stream_structured_rows(video_part, generation_config):
+    """Yield ("metric", row) events from a live model stream and return the full response text"""
+    # Rows already shown cannot be taken back, so the client only retries before the first chunk
+    text, offset = "", 0
+    for chunk_text in _llm.stream(
+        [video_part, STRUCTURED_ANALYSIS_PROMPT],
+        generation_config=GenerationConfig(**generation_config),
+        safety_settings=SAFETY_SETTINGS,
+        description="Analysis",
+    ):
+        text += chunk_text
+        rows, offset = _parse_completed_rows(text, offset)
+        for row in rows:
+            yield "metric", row
+    return text
+
+
+@tracing.traced("translate_text")
+def translate_text(text: str, target_language: str = "English") -> str:
+    """ †ranslate using Gemini 1.5 Pro model"""
+    generation_config = TRANSLATION_GENERATION_CONFIG
+
+    prompt = f"Translate the text to {target_language}"
+    cache_key = result_cache.make_key(text, prompt, MODEL_NAME, generation_config)
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    translation = _llm.generate_sync(
+        [text, prompt],
+        generation_config=generation_config,
+        safety_settings=SAFETY_SETTINGS,
+        description="Translation",
+    )
+    result_cache.put(cache_key, translation)
+    return translation
 
-    if metric == 'Exit Velocity':
-        plt.hist(data['launch_speed'].dropna(), bins=20, color='blue', alpha=0.7)
-        plt.title('Exit Velocity Distribution')
-        plt.xlabel('MPH')
-    elif metric == 'Spin Rate':
-        plt.scatter(data['release_spin_rate'], data['release_speed'], c='green', alpha=0.5)
-        plt.title('Spin Rate vs Pitch Velocity')
-        plt.xlabel('Spin Rate (RPM)')
-        plt.ylabel('Velocity (MPH)')
 
-    plt.grid(True)
-    st.pyplot(plt)
+@tracing.traced("plot_statcast_data")
+def plot_statcast_data(data: pd.DataFrame, metric: str, player_id=None):
+    """Generate visualization for statcast metrics"""
+    st.image(render_metric_png(data, metric, player_id), use_container_width=True)
 
 
 # Language Support
 LANGUAGES = ["English", "Spanish", "French", "German", "Chinese", "Japanese", "Hindi"]
 
 
+@tracing.traced("render_player_insights")
+def display_player_insights(player_data, visualize_metrics: bool):
+    """Render one player's Statcast table, season stats and metric plots"""
+    st.markdown(f"### 🏆 {player_data['player_info']['name']} Performance Insights")
+    col1, col2 = st.columns([.8, .2])
+
+    with col1:
+        st.markdown("**Statcast Data**")
+        if not player_data['statcast'].empty:
+            # Partial selection of the newest ten rows instead of sorting the whole frame
+            st.dataframe(
+                widen_floats(player_data['statcast'][
+                    ['game_date', 'pitch_type', 'release_speed', 'launch_speed',
+                     'launch_angle', 'arm_angle', 'release_spin_rate']].nlargest(
+                    10, 'game_date').reset_index(drop=True)),
+
+            )
+        else:
+            st.warning("No recent Statcast data available")
+
+    with col2:
+        st.markdown("**Season Stats**")
+        if 'stats' in player_data['mlb_stats']:
+            stats = player_data['mlb_stats']['stats'][0]['stats']
+            st.write(f"""
+            - AVG: {stats.get('avg', 'N/A')}
+            - HR: {stats.get('homeRuns', 'N/A')}
+            - RBI: {stats.get('rbi', 'N/A')}
+            - OPS: {stats.get('ops', 'N/A')}
+            """)
+        else:
+            st.warning("No MLB API stats available")
+
+    if visualize_metrics and not player_data['statcast'].empty:
+        st.markdown("### 📈 Metric Visualizations")
+        col1, col2 = st.columns(2)
+        with col1:
+            plot_statcast_data(player_data['statcast'], 'Exit Velocity', player_data['player_info']['id'])
+        with col2:
+            plot_statcast_data(player_data['statcast'], 'Spin Rate', player_data['player_info']['id'])
+
+
+@tracing.traced("render_metrics_comparison")
+def display_metrics_comparison(players):
+    """Render EV50, Hard Hit, Sweet Spot, Adjusted EV and Barrels side by side for the loaded players"""
+    frames = [player['statcast'] for player in players if not player['statcast'].empty]
+    if not frames:
+        return
+    names = {player['player_info']['id']: player['player_info']['name'] for player in players}
+    table = comparison_table(pd.concat(frames, ignore_index=True), names)
+    if not table.empty:
+        st.markdown("### 📊 Batted Ball Quality")
+        st.dataframe(table, hide_index=True)
+
+
+def _render_metrics_table(placeholder, rows, header_future=None, row_futures=None):
+    """Redraw the metrics table; translated tables show the in-order prefix of finished rows.
+
+    row_futures holds (original row Markdown lines, translation future) pairs, one per batch.
+    """
+    if not rows:
+        return
+
+    if row_futures is None:
+        table = metrics_to_markdown(pd.DataFrame([[row[field] for field in ANALYSIS_COLUMNS] for row in rows],
+                                                 columns=list(ANALYSIS_COLUMNS.values())))
+    else:
+        header, separator = _markdown_header(list(ANALYSIS_COLUMNS.values())).split("\n")
+        if header_future.done() and not header_future.exception():
+            header = checked_translation(header_future.result(), [header])[0]
+        lines = [header, separator]
+        for batch, future in row_futures:
+            if not future.done():
+                break
+            lines += checked_translation(future.result(), batch) if not future.exception() else batch
+        table = "\n".join(lines)
+
+    with placeholder.container():
+        st.markdown("### 📊 StatCast Metrics Analysis")
+        st.markdown(table)
+
+
+def stream_metrics_table(video_url: str, lang: str):
+    """Render analysis rows as they stream in, translating finished rows while later ones generate.
+
+    Rows finished while a translation is running are sent together in the next one, up to
+    TRANSLATION_BATCH_ROWS, so a table costs a few model calls rather than one per row.
+    Returns (metric rows, player names).
+    """
+    placeholder = st.empty()
+    rows, player_names = [], []
+    translate = lang != "English"
+
+    with tracing.span("analysis_stream", language=lang) as stage, \
+            ThreadPoolExecutor(max_workers=TRANSLATION_WORKERS) as translator:
+        header_future = None
+        row_futures = None
+        pending = []
+        if translate:
+            header_future = translator.submit(tracing.propagate(translate_text),
+                                              _markdown_row(ANALYSIS_COLUMNS.values()), lang)
+            row_futures = []
+
+        def submit_batch():
+            row_futures.append((list(pending), translator.submit(tracing.propagate(translate_text),
+                                                                 "\n".join(pending), lang)))
+            pending.clear()
+
+        for kind, payload in stream_structured_analysis(video_url):
+            if kind == "players":
+                player_names = payload
+                continue
+            rows.append(payload)
+            if translate:
+                pending.append(_markdown_row(payload[field] for field in ANALYSIS_COLUMNS))
+                if len(pending) >= TRANSLATION_BATCH_ROWS or all(future.done() for _, future in row_futures):
+                    submit_batch()
+            _render_metrics_table(placeholder, rows, header_future, row_futures)
+
+        # Generation is done; keep redrawing as the remaining translations land
+        if translate:
+            if pending:
+                submit_batch()
+            header_future.exception()
+            for _, future in row_futures:
+                future.exception()
+                _render_metrics_table(placeholder, rows, header_future, row_futures)
+        stage.set(rows=len(rows), players=len(player_names))
+
+    return rows, player_names
+
+
+def segmented_metrics_table(video_url: str, duration_seconds: float, lang: str):
+    """Analyze a long video segment by segment and render the merged table; returns (metric rows, player names)"""
+    metrics, player_names = analyze_video_segmented(video_url, duration_seconds)
+    if not metrics.empty:
+        table = metrics_to_markdown(metrics)
+        if lang != "English":
+            table = "\n".join(checked_translation(translate_text(table, lang), table.split("\n")))
+        st.markdown("### 📊 StatCast Metrics Analysis")
+        st.markdown(table)
+    return [dict(zip(ANALYSIS_COLUMNS, row)) for row in metrics.itertuples(index=False)], player_names
+
+
 def display_home_page():
     # st.set_page_config(page_title="StatCast Analyzer Pro", page_icon=DEFAULT_IMAGE, layout="wide")
 
@@ -208,6 +675,18 @@ def display_home_page():
         compare_historical = st.checkbox("Enable Players Historical Data", value=True)
         visualize_metrics = st.checkbox("Enable Metric Visualizations", value=True)
         lang = st.selectbox("Select Language", LANGUAGES, index=0)
+        statcast_window = st.date_input(
+            "Statcast Date Range",
+            value=(pd.Timestamp(STATCAST_START_DATE).date(), pd.Timestamp.today().date()),
+            help="Shorter windows download and render faster"
+        )
+        segmented = st.checkbox("Segmented analysis for long videos", value=False)
+        video_minutes = st.number_input(
+            "Video length (minutes)", min_value=1, max_value=180, value=10, disabled=not segmented,
+            help="Round up to the full length of the video: only this many minutes are analyzed"
+        )
+        if segmented:
+            st.caption(f"Anything after minute {video_minutes} of the video is ignored.")
 
     st.title("⚾ MLB StatCast Video Analysis")
     video_url = st.text_input(
@@ -223,67 +702,29 @@ def display_home_page():
 
         with st.spinner("Analyzing video content..."):
             try:
-                analysis = analyze_video(video_url)
-
-                if "| Timestamp Range | Metric |" in analysis:
-                    st.markdown("### 📊 StatCast Metrics Analysis")
-                    if lang != "English":
-                        st.markdown(translate_text(analysis, lang))
-                    else:
-                        st.markdown(analysis)
-                    try:
-                        player_names = get_player_names(analysis).split(",")
-                    except Exception as e:
-                        st.error(f"Error extracting player names: {str(e)}")
-                        player_names = []
-
-                if compare_historical:
-                    for player_name in player_names:
+                if segmented:
+                    rows, player_names = segmented_metrics_table(video_url, video_minutes * 60, lang)
+                else:
+                    rows, player_names = stream_metrics_table(video_url, lang)
+
+                if rows:
+                    if compare_historical:
                         with st.spinner("Fetching player data..."):
-                            player_data = get_player_stats(player_name)
-                            # st.write(player_data)
-                            # st.write(player_data["mlb_stats"]["id","first_name","last_name","current_team","position"])
-                            # st.write(player_data["mlb_stats"]["stats"][0])
-
-                            if player_data:
-                                st.markdown(f"### 🏆 {player_data['player_info']['name']} Performance Insights")
-                                col1, col2 = st.columns([.8, .2])
-
-                                with col1:
-                                    st.markdown("**Statcast Data**")
-                                    if not player_data['statcast'].empty:
-                                        st.dataframe(
-                                            player_data['statcast'][
-                                                ['game_date', 'pitch_type', 'release_speed', 'launch_speed',
-                                                 'launch_angle', 'arm_angle', 'release_spin_rate']].sort_values(
-                                                'game_date', ascending=False).reset_index(drop=True).iloc[:10],
-
-                                        )
-                                    else:
-                                        st.warning("No recent Statcast data available")
-
-                                with col2:
-                                    st.markdown("**Season Stats**")
-                                    if 'stats' in player_data['mlb_stats']:
-                                        stats = player_data['mlb_stats']['stats'][0]['stats']
-                                        st.write(f"""
-                                        - AVG: {stats.get('avg', 'N/A')}
-                                        - HR: {stats.get('homeRuns', 'N/A')}
-                                        - RBI: {stats.get('rbi', 'N/A')}
-                                        - OPS: {stats.get('ops', 'N/A')}
-                                        """)
-                                    else:
-                                        st.warning("No MLB API stats available")
-
-                                if visualize_metrics and not player_data['statcast'].empty:
-                                    st.markdown("### 📈 Metric Visualizations")
-                                    col1, col2 = st.columns(2)
-                                    with col1:
-                                        plot_statcast_data(player_data['statcast'], 'Exit Velocity')
-                                    with col2:
-                                        plot_statcast_data(player_data['statcast'], 'Spin Rate')
-
-                    st.success("Analysis complete!")
+                            # The range picker returns fewer than two dates while a range is being chosen
+                            start_date, end_date = (tuple(statcast_window) + (None, None))[:2]
+                            loaded = []
+                            for player_name, player_data, error in fetch_players_stats(player_names, start_date,
+                                                                                       end_date):
+                                if isinstance(error, LookupError):
+                                    st.error(str(error))
+                                elif error:
+                                    st.error(f"Error fetching player data: {str(error)}")
+                                else:
+                                    display_player_insights(player_data, visualize_metrics)
+                                    loaded.append(player_data)
+                            display_metrics_comparison(loaded)
+
+                        st.success("Analysis complete!")
                 else:
                     st.warning("No StatCast metrics detected. Try a different video.")
 
@@ -1,18 +1,32 @@
+import sys
+import importlib
+import threading
 import streamlit as st
-from StatVision import display_home_page
-from glossary import display_statcast_glossary
-from injuryrisk import display_risk_details
+import tracing
 DEFAULT_IMAGE = "StatVision.jpg"
+# Pages are imported on first navigation, so the Glossary never pays for Vertex AI or pybaseball
+PAGES = {
+    "Home": ("StatVision", "display_home_page"),
+    "Statcast Glossary": ("glossary", "display_statcast_glossary"),
+    "injuryriskanalysis": ("injuryrisk", "display_risk_details"),
+}
 # Set the page title and sidebar
 st.set_page_config(page_title="StatCast Analyzer Pro", page_icon=DEFAULT_IMAGE)
 # Sidebar navigation
 st.sidebar.title("StatVision Navigation")
-page = st.sidebar.radio("Go to", ["Home", "Statcast Glossary",'injuryriskanalysis'])
+page = st.sidebar.radio("Go to", list(PAGES))
+show_timings = st.sidebar.checkbox("Show performance panel", value=False)
 
-# Show the selected page
-if page == "Home":
-    display_home_page()  # Call function from hom.py
-elif page == "Statcast Glossary":
-    display_statcast_glossary()  # Call function from glossary.py
-elif page=="injuryriskanalysis" :
-    display_risk_details()
\ No newline at end of file
+# The nightly risk precompute runs inside the app process; its import stays off the first render
+if "risk_store" not in sys.modules:
+    threading.Thread(target=lambda: importlib.import_module("risk_store").start_nightly(),
+                     name="risk-nightly-start", daemon=True).start()
+
+# Show the selected page, timing each stage of the run
+module_name, function_name = PAGES[page]
+try:
+    with tracing.trace_run(page) as trace:
+        getattr(importlib.import_module(module_name), function_name)()
+finally:
+    if show_timings:
+        tracing.display_trace_panel(trace)
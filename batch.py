@@ -0,0 +1,240 @@
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import pandas as pd
+import tracing
+
+# Constants
+BATCH_WORKERS = 8
+IN_FLIGHT_PER_WORKER = 2  # submitted jobs per worker; keeps workers busy without queueing the whole input
+PARQUET_SUFFIXES = (".parquet", ".pq")
+RECORD_FIELDS = ["id", "kind", "input", "status", "error", "elapsed_ms", "trace_id", "result"]
+
+
+def _clean(record: dict) -> dict:
+    """Drop empty CSV cells and surrounding whitespace, so both input formats read the same"""
+    cleaned = {}
+    for field, value in record.items():
+        if isinstance(value, str):
+            value = value.strip()
+        if field and value not in (None, ""):
+            cleaned[field.strip()] = value
+    return cleaned
+
+
+def read_jobs(path: str):
+    """Read batch jobs from a JSONL or CSV file with a video_url or player field per record.
+
+    Records may also set id (defaults to the kind and input) and, for videos, duration_seconds
+    to analyze a long clip in segments.
+    """
+    with open(path, newline="") as f:
+        if path.lower().endswith(".csv"):
+            records = [_clean(row) for row in csv.DictReader(f)]
+        else:
+            records = [_clean(json.loads(line)) for line in f if line.strip()]
+
+    jobs, seen = [], set()
+    for line_number, record in enumerate(records, start=1):
+        if "video_url" in record:
+            kind, value = "video", record["video_url"]
+        elif "player" in record:
+            kind, value = "player", record["player"]
+        else:
+            raise ValueError(f"{path} record {line_number} has neither a video_url nor a player field")
+
+        job_id = str(record.get("id", f"{kind}:{value}"))
+        if job_id in seen:
+            continue
+        seen.add(job_id)
+        jobs.append({"id": job_id, "kind": kind, "input": value,
+                     "duration_seconds": record.get("duration_seconds")})
+    return jobs
+
+
+def _analyze_video(job, start_date, end_date) -> dict:
+    import StatVision
+    if job["duration_seconds"]:
+        metrics, player_names = StatVision.analyze_video_segmented(job["input"], float(job["duration_seconds"]))
+    else:
+        metrics, player_names = StatVision.analyze_video_structured(job["input"])
+    rows = [dict(zip(StatVision.ANALYSIS_COLUMNS, row)) for row in metrics.itertuples(index=False)]
+    return {"metrics": rows, "players": player_names}
+
+
+def _analyze_player(job, start_date, end_date) -> dict:
+    import StatVision
+    import injuryrisk
+    from risk_store import season_aggregates
+    from statcast_frames import widen_floats
+
+    # Raises LookupError for unknown names, recorded as the job's error
+    player_data = StatVision.fetch_player_stats(job["input"], start_date, end_date)
+    player_info = injuryrisk.get_player_info(job["input"])
+    risk_results, injury_history, _ = injuryrisk.load_player_risk(player_info)
+    statcast = player_data["statcast"]
+    return {
+        **player_data["player_info"],
+        "mlb_stats": player_data["mlb_stats"],
+        "statcast_pitches": len(statcast),
+        "season_aggregates": season_aggregates(widen_floats(statcast)).drop(columns="player_id").to_dict("records"),
+        "injury_risk": risk_results,
+        "injuries": injury_history,
+    }
+
+
+JOB_RUNNERS = {
+    "video": _analyze_video,
+    "player": _analyze_player,
+}
+
+
+def run_job(job, start_date=None, end_date=None) -> dict:
+    """Run one job under its own trace, returning its output record; failures become error records"""
+    start = time.perf_counter()
+    record = {"id": job["id"], "kind": job["kind"], "input": job["input"], "status": "ok", "error": None}
+    with tracing.trace_run(f"batch_{job['kind']}") as trace:
+        try:
+            record["result"] = JOB_RUNNERS[job["kind"]](job, start_date, end_date)
+        except Exception as e:
+            tracing.record_error(e)
+            record.update(status="error", error=f"{type(e).__name__}: {e}", result=None)
+    record.update(elapsed_ms=round((time.perf_counter() - start) * 1000, 2), trace_id=trace.id)
+    return record
+
+
+def _is_parquet(path: str) -> bool:
+    return path.lower().endswith(PARQUET_SUFFIXES)
+
+
+def checkpoint_path(output: str) -> str:
+    """JSONL output is its own checkpoint; Parquet output is assembled from a JSONL checkpoint at the end"""
+    return f"{output}.checkpoint.jsonl" if _is_parquet(output) else output
+
+
+def read_finished(output: str) -> dict:
+    """Return {job id: latest record} from earlier runs' output and checkpoint.
+
+    A checkpoint line cut off by an interruption is ignored, so its job runs again.
+    """
+    records = {}
+    if _is_parquet(output) and os.path.exists(output):
+        for record in pd.read_parquet(output).to_dict("records"):
+            record["result"] = None if record["result"] is None else json.loads(record["result"])
+            records[record["id"]] = record
+
+    path = checkpoint_path(output)
+    if not os.path.exists(path):
+        return records
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            records[record["id"]] = record
+    return records
+
+
+def write_output(output: str, records):
+    """Atomically write the final records as JSONL or Parquet, with nested results as JSON text in Parquet"""
+    tmp_path = f"{output}.tmp"
+    if _is_parquet(output):
+        frame = pd.DataFrame(records, columns=RECORD_FIELDS)
+        frame["result"] = [None if result is None else json.dumps(result, default=str) for result in frame["result"]]
+        frame.to_parquet(tmp_path, index=False)
+    else:
+        with open(tmp_path, "w") as f:
+            for record in records:
+                f.write(json.dumps(record, default=str) + "\n")
+    os.replace(tmp_path, output)
+
+
+def run_batch(jobs, output: str, workers: int = BATCH_WORKERS, start_date=None, end_date=None,
+              retry_failed: bool = True, log=print) -> dict:
+    """Run jobs through a bounded worker pool, checkpointing each finished record.
+
+    Jobs with a successful record in the checkpoint are skipped, so an interrupted run resumes
+    where it stopped; failed jobs are run again unless retry_failed is off. Only a few jobs per
+    worker are in flight at once, so memory stays flat however long the input is.
+    """
+    checkpoint = checkpoint_path(output)
+    records = read_finished(output)
+    done = {job_id for job_id, record in records.items() if record["status"] == "ok" or not retry_failed}
+    todo = [job for job in jobs if job["id"] not in done]
+    log(f"{len(jobs) - len(todo)} of {len(jobs)} jobs already done, running {len(todo)}")
+
+    started = time.perf_counter()
+    finished = failed = 0
+    os.makedirs(os.path.dirname(os.path.abspath(checkpoint)), exist_ok=True)
+    if os.path.exists(checkpoint) and os.path.getsize(checkpoint):
+        with open(checkpoint, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            cut_off = f.read(1) != b"\n"
+        if cut_off:
+            with open(checkpoint, "a") as f:
+                f.write("\n")
+    with open(checkpoint, "a") as f, ThreadPoolExecutor(max_workers=workers,
+                                                        thread_name_prefix="statvision-batch") as pool:
+        def collect(futures):
+            nonlocal finished, failed
+            for future in futures:
+                record = future.result()
+                # One line per finished job, flushed at once, so an interruption loses only jobs in flight
+                f.write(json.dumps(record, default=str) + "\n")
+                f.flush()
+                records[record["id"]] = record
+                finished += 1
+                failed += record["status"] != "ok"
+                rate = finished / (time.perf_counter() - started)
+                log(f"[{finished}/{len(todo)}] {record['id']} {record['status']} "
+                    f"{record['elapsed_ms'] / 1000:.1f}s ({rate * 60:.1f} jobs/min)"
+                    + (f": {record['error']}" if record["error"] else ""))
+
+        pending = set()
+        try:
+            for job in todo:
+                if len(pending) >= workers * IN_FLIGHT_PER_WORKER:
+                    completed, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(completed)
+                pending.add(pool.submit(run_job, job, start_date, end_date))
+            while pending:
+                completed, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(completed)
+        except KeyboardInterrupt:
+            for future in pending:
+                future.cancel()
+            log("Interrupted; finished jobs are checkpointed and the next run resumes from them")
+            raise
+
+    write_output(output, [records[job["id"]] for job in jobs if job["id"] in records])
+    if checkpoint != output:
+        os.remove(checkpoint)
+    return {"jobs": len(jobs), "ran": finished, "failed": failed, "seconds": round(time.perf_counter() - started, 2)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Analyze videos and players without the UI. Input records carry a video_url or a player "
+                    "field; results are written as JSONL or Parquet, and re-running resumes an interrupted run.")
+    parser.add_argument("input", help="JSONL or CSV file of jobs")
+    parser.add_argument("output", help="results file; .parquet or .pq writes Parquet, anything else JSONL")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS)
+    parser.add_argument("--start-date", help="start of the Statcast window for players, YYYY-MM-DD")
+    parser.add_argument("--end-date", help="end of the Statcast window for players, YYYY-MM-DD")
+    parser.add_argument("--skip-failed", action="store_true", help="do not retry jobs that failed in an earlier run")
+    args = parser.parse_args(argv)
+
+    summary = run_batch(read_jobs(args.input), args.output, workers=args.workers, start_date=args.start_date,
+                        end_date=args.end_date, retry_failed=not args.skip_failed,
+                        log=lambda message: print(message, file=sys.stderr))
+    print(f"Ran {summary['ran']} of {summary['jobs']} jobs in {summary['seconds']}s, {summary['failed']} failed")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,506 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import types
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Constants
+PLAYER_COUNTS = [1, 4]
+ROW_COUNTS = [1_000, 50_000]  # pitches per year of requested window in fake Statcast downloads
+ITERATIONS = 5
+MODEL_LATENCY = 0.5  # seconds per fake Gemini response
+SOURCE_LATENCY = 0.05  # seconds per fake statsapi or pybaseball request
+MODEL_CHUNKS = 8  # streamed fake responses arrive in this many chunks
+ROSTER_SIZE = 40
+SAMPLE_VIDEO_SECONDS = 600  # length given for the local sample clip of the segmented analysis case
+SAMPLE_VIDEO_BYTES = 256 * 1024
+FIRST_PLAYER_ID = 900001
+REGRESSION_TOLERANCE = 0.25
+NOISE_FLOOR = {"p95_ms": 5.0, "peak_mib": 1.0}  # smaller differences are never reported as regressions
+PITCH_TYPES = ["FF", "SI", "SL", "CH", "CU", "FC"]
+BATTED_EVENTS = ["single", "double", "triple", "home_run", "field_out", "grounded_into_double_play"]
+
+# Knobs read by the stand-ins on every call
+settings = {
+    "rows": ROW_COUNTS[0],
+    "players": PLAYER_COUNTS[0],
+    "model_latency": MODEL_LATENCY,
+    "source_latency": SOURCE_LATENCY,
+}
+
+
+def roster():
+    """The synthetic players the fake MLB API knows, as (mlb_id, name) pairs"""
+    return [(FIRST_PLAYER_ID + i, f"Bench Player{i + 1}") for i in range(ROSTER_SIZE)]
+
+
+def player_names(count):
+    return [name for _, name in roster()[:count]]
+
+
+def synthetic_statcast(start_dt, end_dt, player_id):
+    """Stand-in for pybaseball.statcast_batter returning settings['rows'] pitches per year of requested days"""
+    time.sleep(settings["source_latency"])
+    days = pd.date_range(start_dt, end_dt, freq="D")
+    rows = round(settings["rows"] * len(days) / 365)
+    if days.empty or not rows:
+        return pd.DataFrame()
+
+    rng = np.random.default_rng([int(player_id), days[0].value // 10 ** 9])
+    batted = rng.random(rows) < 0.35
+    launch_speed_angle = rng.integers(1, 7, rows).astype("float64")
+    return pd.DataFrame({
+        "pitch_type": rng.choice(PITCH_TYPES, rows),
+        # Statcast returns the newest pitches first
+        "game_date": np.sort(rng.choice(days.to_numpy(), rows))[::-1],
+        "release_speed": rng.normal(92, 4, rows).round(1),
+        "release_spin_rate": rng.normal(2300, 250, rows).round(),
+        "batter": int(player_id),
+        "pitcher": rng.integers(400000, 700000, rows),
+        "events": np.where(batted, rng.choice(BATTED_EVENTS, rows), None),
+        "description": np.where(batted, "hit_into_play", rng.choice(["ball", "called_strike", "foul"], rows)),
+        "zone": rng.integers(1, 15, rows),
+        "type": np.where(batted, "X", rng.choice(["B", "S"], rows)),
+        "plate_x": rng.normal(0, 0.8, rows).round(2),
+        "plate_z": rng.normal(2.5, 0.7, rows).round(2),
+        "game_year": days[0].year,
+        "launch_speed": np.where(batted, rng.normal(89, 12, rows).round(1), np.nan),
+        "launch_angle": np.where(batted, rng.normal(12, 25, rows).round(), np.nan),
+        "launch_speed_angle": np.where(batted, launch_speed_angle, np.nan),
+        "estimated_ba_using_speedangle": np.where(batted, rng.random(rows).round(3), np.nan),
+        "arm_angle": rng.normal(40, 6, rows).round(1),
+    })
+
+
+def _statsapi_get(endpoint, params=None):
+    time.sleep(settings["source_latency"])
+    if endpoint == "sports_players":
+        return {"people": [
+            {"id": mlb_id, "fullName": name, "primaryPosition": {"abbreviation": "RF"}} for mlb_id, name in roster()
+        ]}
+    # One team carrying the whole synthetic roster, for the nightly risk batch
+    if endpoint == "teams":
+        return {"teams": [{"id": 1}]}
+    if endpoint == "team_roster":
+        return {"roster": [{"person": {"id": mlb_id, "fullName": name}} for mlb_id, name in roster()]}
+    return {}
+
+
+def _player_stat_data(player_id, group="hitting", type="season"):
+    time.sleep(settings["source_latency"])
+    if group == "health":
+        return {"id": player_id, "stats": [{"description": "Left hamstring strain", "date": "2024-05-02"}]}
+    return {"id": player_id, "stats": [{"stats": {"avg": ".281", "homeRuns": 24, "rbi": 80, "ops": ".850"}}]}
+
+
+def _metric_rows(names):
+    rows = []
+    for index, name in enumerate(names):
+        start = 10 * index
+        rows.append({
+            "timestamp_range": f"00:00:{start:02d} - 00:00:{start + 3:02d}",
+            "metric": "Pitch velocity",
+            "value": "97.1 mph",
+            "identification_method": "Broadcast radar overlay",
+            "play_analysis": f"Fastball up in the zone to {name}",
+        })
+        rows.append({
+            "timestamp_range": f"00:00:{start + 4:02d} - 00:00:{start + 8:02d}",
+            "metric": "Exit velocity",
+            "value": "108.4 mph",
+            "identification_method": "Statcast graphic",
+            "play_analysis": f"{name} lines the pitch into the gap",
+        })
+    return rows
+
+
+class _FakeChunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """Stand-in for the Vertex AI GenerativeModel answering each app prompt after settings['model_latency']"""
+
+    def __init__(self, model_name, **kwargs):
+        self.model_name = model_name
+
+    def _respond(self, contents, generation_config):
+        prompt = contents[-1]
+        names = player_names(settings["players"])
+        if isinstance(generation_config, dict) and generation_config.get("response_mime_type") == "application/json":
+            return json.dumps({"metrics": _metric_rows(names), "players": names})
+        if prompt.startswith("Translate the text"):
+            return contents[0]
+        lines = ["| Timestamp Range | Metric | Value | Identification Method | Play Analysis |",
+                 "|-----------------|--------|-------|------------------------|---------------|"]
+        lines += ["| " + " | ".join(row.values()) + " |" for row in _metric_rows(names)]
+        return "\n".join(lines)
+
+    def _stream(self, text):
+        size = max(1, -(-len(text) // MODEL_CHUNKS))
+        for start in range(0, len(text), size):
+            time.sleep(settings["model_latency"] / MODEL_CHUNKS)
+            yield _FakeChunk(text[start:start + size])
+
+    async def _stream_async(self, text):
+        size = max(1, -(-len(text) // MODEL_CHUNKS))
+        for start in range(0, len(text), size):
+            await asyncio.sleep(settings["model_latency"] / MODEL_CHUNKS)
+            yield _FakeChunk(text[start:start + size])
+
+    def generate_content(self, contents, generation_config=None, safety_settings=None, stream=False):
+        text = self._respond(contents, generation_config)
+        if stream:
+            return self._stream(text)
+        time.sleep(settings["model_latency"])
+        return _FakeChunk(text)
+
+    async def generate_content_async(self, contents, generation_config=None, safety_settings=None, stream=False):
+        text = self._respond(contents, generation_config)
+        if stream:
+            return self._stream_async(text)
+        await asyncio.sleep(settings["model_latency"])
+        return _FakeChunk(text)
+
+
+class _FakePart:
+    @staticmethod
+    def from_uri(mime_type=None, uri=None):
+        return {"mime_type": mime_type, "uri": uri}
+
+    @staticmethod
+    def from_data(data=None, mime_type=None):
+        return {"mime_type": mime_type, "data": data}
+
+    @staticmethod
+    def from_dict(part):
+        return dict(part)
+
+
+class _FakePage:
+    """Scripted widget values for the fake Streamlit, and the errors a run reported"""
+
+    def __init__(self):
+        self.inputs = {}
+        self.errors = []
+
+
+page = _FakePage()
+
+
+class _FakeBlock:
+    """Stand-in for a Streamlit container: widgets return scripted inputs, other elements are no-ops"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        # Any other element (st.title, st.spinner, st.empty, st.image, ...) renders nothing
+        return lambda *args, **kwargs: _FakeBlock()
+
+    def text_input(self, label, value="", **kwargs):
+        return page.inputs.get(label, value)
+
+    def button(self, label, **kwargs):
+        return True
+
+    def checkbox(self, label, value=False, **kwargs):
+        return page.inputs.get(label, value)
+
+    def selectbox(self, label, options, index=0, **kwargs):
+        return page.inputs.get(label, list(options)[index])
+
+    radio = selectbox
+
+    def date_input(self, label, value=None, **kwargs):
+        return page.inputs.get(label, value)
+
+    number_input = date_input
+
+    def columns(self, spec, **kwargs):
+        return [_FakeBlock() for _ in range(spec if isinstance(spec, int) else len(spec))]
+
+    def error(self, body, **kwargs):
+        page.errors.append(str(body))
+        return _FakeBlock()
+
+    def dataframe(self, data, **kwargs):
+        # Streamlit ships tables to the browser as Arrow, so keep that conversion in the measurement
+        pa.Table.from_pandas(pd.DataFrame(data))
+        return _FakeBlock()
+
+    table = dataframe
+
+
+def _module(name, **attributes):
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    sys.modules[name] = module
+    return module
+
+
+def install_fakes():
+    """Register the local stand-ins in sys.modules; must run before any app module is imported"""
+    _module("statsapi", get=_statsapi_get, player_stat_data=_player_stat_data)
+    _module("pybaseball", statcast_batter=synthetic_statcast, chadwick_register=lambda: pd.DataFrame(
+        columns=["name_first", "name_last", "key_mlbam", "mlb_played_last"]))
+
+    harm = types.SimpleNamespace
+    safety_setting = harm(
+        HarmCategory=harm(HARM_CATEGORY_HATE_SPEECH=1, HARM_CATEGORY_DANGEROUS_CONTENT=2,
+                          HARM_CATEGORY_SEXUALLY_EXPLICIT=3, HARM_CATEGORY_HARASSMENT=4),
+        HarmBlockThreshold=harm(BLOCK_ONLY_HIGH=3),
+    )
+    vertexai = _module("vertexai", init=lambda **kwargs: None)
+    vertexai.generative_models = _module(
+        "vertexai.generative_models", GenerativeModel=FakeGenerativeModel, Part=_FakePart,
+        GenerationConfig=lambda **config: config, SafetySetting=safety_setting,
+    )
+
+    try:
+        import google
+    except ImportError:
+        google = _module("google", __path__=[])
+    service_account = _module("google.oauth2.service_account", Credentials=types.SimpleNamespace(
+        from_service_account_file=lambda path: None))
+    google.oauth2 = _module("google.oauth2", service_account=service_account)
+
+    root = _FakeBlock()
+    _module("streamlit", __getattr__=lambda name: getattr(root, name), sidebar=_FakeBlock())
+
+
+def reset_caches():
+    """Drop cached downloads, model responses, shared results and charts; the player registry stays loaded"""
+    import statcast_cache
+    import result_cache
+    import risk_store
+    import single_flight
+    import statcast_plots
+
+    if os.path.isdir(statcast_cache.CACHE_DIR):
+        for entry in os.listdir(statcast_cache.CACHE_DIR):
+            path = os.path.join(statcast_cache.CACHE_DIR, entry)
+            if entry.startswith("player="):
+                shutil.rmtree(path, ignore_errors=True)
+            elif path in (os.path.join(statcast_cache.CACHE_DIR, statcast_cache.MANIFEST_FILE),
+                          result_cache.RESULT_CACHE_PATH, risk_store.STORE_PATH):
+                os.remove(path)
+    single_flight.store = single_flight.SharedStore()
+    statcast_plots._plot_cache.clear()
+
+
+# Each case does its untimed setup and returns the callable to time
+def bench_get_player_stats(names):
+    import StatVision
+    return lambda: [StatVision.get_player_stats(name) for name in names]
+
+
+def bench_analyze_injury_risk(names):
+    import injuryrisk
+    frames = [injuryrisk.fetch_statcast_data(injuryrisk.get_player_info(name)["statcast_id"]) for name in names]
+    return lambda: [injuryrisk.analyze_injury_risk(frame) for frame in frames]
+
+
+def bench_plot_statcast_data(names):
+    import StatVision
+    players = [StatVision.fetch_player_stats(name) for name in names]
+
+    def run():
+        for player in players:
+            for metric in ("Exit Velocity", "Spin Rate"):
+                StatVision.plot_statcast_data(player["statcast"], metric, player["player_info"]["id"])
+    return run
+
+
+def bench_display_home_page(names):
+    import StatVision
+    page.inputs = {"Video URL:": f"https://www.youtube.com/watch?v=bench{len(names)}"}
+    return StatVision.display_home_page
+
+
+def bench_analyze_video_segmented(names):
+    import StatVision
+    from statcast_cache import CACHE_DIR
+    sample = os.path.join(CACHE_DIR, "sample_clip.mp4")
+    if not os.path.exists(sample):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(sample, "wb") as f:
+            f.write(np.random.default_rng(0).bytes(SAMPLE_VIDEO_BYTES))
+    return lambda: StatVision.analyze_video_segmented(sample, SAMPLE_VIDEO_SECONDS)
+
+
+def bench_display_risk_details(names):
+    import injuryrisk
+
+    def run():
+        for name in names:
+            page.inputs = {"Enter Player Name (First Last):": name}
+            injuryrisk.display_risk_details()
+    return run
+
+
+def bench_risk_batch(names):
+    import risk_store
+    players = {mlb_id: name for mlb_id, name in roster() if name in names}
+    return lambda: risk_store.run_batch(players)
+
+
+CASES = {
+    "get_player_stats": bench_get_player_stats,
+    "analyze_injury_risk": bench_analyze_injury_risk,
+    "plot_statcast_data": bench_plot_statcast_data,
+    "display_home_page": bench_display_home_page,
+    "analyze_video_segmented": bench_analyze_video_segmented,
+    "display_risk_details": bench_display_risk_details,
+    "risk_batch": bench_risk_batch,
+}
+
+
+def _run_once(case_name, names, cold, trace=False):
+    """Run a case once and return (seconds, peak traced bytes or None)"""
+    if cold:
+        reset_caches()
+    run = CASES[case_name](names)
+    page.errors.clear()
+
+    peak = None
+    if trace:
+        tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        if trace:
+            peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        if trace:
+            tracemalloc.stop()
+
+    if page.errors:
+        raise RuntimeError(f"{case_name} reported an error: {page.errors[0]}")
+    return elapsed, peak
+
+
+def run_case(case_name, player_count, rows, iterations, cold):
+    """Time a case over several iterations, then run it once more under tracemalloc for peak memory.
+
+    Latency runs stay untraced because tracemalloc slows allocation-heavy code several times over.
+    Warm runs are primed once, so every timed iteration reads from the caches.
+    """
+    settings.update(players=player_count, rows=rows)
+    names = player_names(player_count)
+    reset_caches()
+    if not cold:
+        _run_once(case_name, names, cold=False)
+
+    samples = [_run_once(case_name, names, cold)[0] for _ in range(iterations)]
+    _, peak = _run_once(case_name, names, cold, trace=True)
+    p50, p95 = np.percentile(samples, [50, 95]) * 1000
+    return {
+        "case": case_name,
+        "cache": "cold" if cold else "warm",
+        "players": player_count,
+        "rows": rows,
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "peak_mib": round(peak / 1024 ** 2, 2),
+    }
+
+
+def _result_key(result):
+    return result["case"], result["cache"], result["players"], result["rows"]
+
+
+def find_regressions(results, baseline, tolerance=REGRESSION_TOLERANCE):
+    """Compare results with a previous run's, returning a description of each slower or larger case"""
+    previous = {_result_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get(_result_key(result))
+        if before is None:
+            continue
+        for field, floor in NOISE_FLOOR.items():
+            if result[field] - before[field] > max(before[field] * tolerance, floor):
+                regressions.append(f"{' / '.join(map(str, _result_key(result)))}: "
+                                   f"{field} {before[field]} -> {result[field]}")
+    return regressions
+
+
+REPORT_HEADER = f"{'case':<25}{'cache':<7}{'players':>8}{'rows':>10}{'p50 ms':>11}{'p95 ms':>11}{'peak MiB':>10}"
+
+
+def format_result(r):
+    return (f"{r['case']:<25}{r['cache']:<7}{r['players']:>8}{r['rows']:>10}"
+            f"{r['p50_ms']:>11.1f}{r['p95_ms']:>11.1f}{r['peak_mib']:>10.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Time the StatVision pages offline against local stand-ins for statsapi, "
+                    "pybaseball and Vertex AI, reporting p50/p95 latency and peak traced memory.")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--players", nargs="+", type=int, default=PLAYER_COUNTS,
+                        help=f"player counts to run, at most {ROSTER_SIZE}")
+    parser.add_argument("--rows", nargs="+", type=int, default=ROW_COUNTS, help="pitches per year in fake Statcast downloads")
+    parser.add_argument("--iterations", type=int, default=ITERATIONS)
+    parser.add_argument("--cache", choices=["cold", "warm", "both"], default="both")
+    parser.add_argument("--model-latency", type=float, default=MODEL_LATENCY, help="seconds per fake model response")
+    parser.add_argument("--source-latency", type=float, default=SOURCE_LATENCY,
+                        help="seconds per fake statsapi or pybaseball request")
+    parser.add_argument("--cache-dir", help="cache directory to use instead of a temporary one")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="results JSON of an earlier run; regressions make the exit status 1")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    if max(args.players) > ROSTER_SIZE:
+        parser.error(f"--players must be at most {ROSTER_SIZE}")
+    settings.update(model_latency=args.model_latency, source_latency=args.source_latency)
+
+    # The caches read their location at import time, so it is set before any app module loads
+    cache_dir = args.cache_dir or tempfile.mkdtemp(prefix="statvision-bench-")
+    os.environ["STATVISION_CACHE_DIR"] = cache_dir
+    install_fakes()
+
+    modes = {"cold": [True], "warm": [False], "both": [True, False]}[args.cache]
+    results = []
+    print(REPORT_HEADER)
+    print("-" * len(REPORT_HEADER))
+    try:
+        for case_name in args.cases:
+            for cold in modes:
+                for player_count in args.players:
+                    for rows in args.rows:
+                        results.append(run_case(case_name, player_count, rows, args.iterations, cold))
+                        print(format_result(results[-1]), flush=True)
+    finally:
+        if not args.cache_dir:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,66 +2,62 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import statsapi
-from pybaseball import playerid_lookup, statcast_batter
-
-# Define Risk Factors
-RISK_FACTORS = {
-    "Exit Velocity Drop": ("launch_speed", 3),  # 3 mph drop
-    "Spin Rate Drop": ("release_spin_rate", 150),  # 150 rpm drop
-    "Pitch Velocity Drop": ("release_speed", 2),  # 2 mph drop
-    "Arm Angle Changes": ("arm_angle", 5),  # 5-degree change
-    "Sprint Speed Drop": ("sprint_speed", 0.5),  # 0.5 ft/sec drop
-}
+from concurrent.futures import ThreadPoolExecutor
+from statcast_frames import RISK_COLUMNS, load_compact_statcast, widen_floats
+from player_index import resolve_player
+from risk_engine import RISK_FACTORS, risk_window
+import risk_store
+import single_flight
+import tracing
 
 
+@tracing.traced("get_player_info")
+@single_flight.shared("get_player_info")
 def get_player_info(name):
-    """Find player ID using MLB API & pybaseball"""
-    mlb_data = statsapi.lookup_player(name)
-    if not mlb_data:
-        return None
-
-    full_name = mlb_data[0]['fullName']
-    player_id = mlb_data[0]['id']
-
-    name_parts = full_name.split()
-    last, first = name_parts[-1], name_parts[0]
-    pb_data = playerid_lookup(last, first)
-
-    if pb_data.empty:
+    """Find player IDs in the local player registry"""
+    player = resolve_player(name)
+    if not player:
         return None
 
     return {
-        "id": player_id,
-        "name": full_name,
-        "statcast_id": pb_data.iloc[0]["key_mlbam"]
+        "id": player["mlb_id"],
+        "name": player["name"],
+        "statcast_id": player["mlbam_id"]
     }
 
 
+@tracing.traced("fetch_statcast_data")
+@single_flight.shared("fetch_statcast_data")
 def fetch_statcast_data(player_id):
     """Retrieve player's recent Statcast metrics"""
     try:
-        data = statcast_batter("2024-04-01", "2024-07-01", player_id)
+        data = load_compact_statcast(player_id, *risk_window(), columns=RISK_COLUMNS)
         return data if not data.empty else None
-    except:
+    except Exception as e:
+        tracing.record_error(e)
         return None
 
 
+@tracing.traced("fetch_injury_history")
 def fetch_injury_history(player_id):
-    """Fetch past injuries for a player using MLB API"""
+    """Fetch past injuries for a player using MLB API; None when the lookup failed"""
     try:
         injury_data = statsapi.player_stat_data(player_id, group="health", type="career")
         return injury_data.get("stats", [])
-    except:
-        return []
+    except Exception as e:
+        tracing.record_error(e)
+        return None
 
 
+@tracing.traced("analyze_injury_risk")
 def analyze_injury_risk(statcast_data):
     """Analyze recent player trends to detect injury risks"""
     if statcast_data is None:
         return []
 
     risk_results = []
-    recent_data = statcast_data.sort_values('game_date', ascending=False).head(10)
+    # Stable, so pitches of the same day keep Statcast's newest-first order
+    recent_data = widen_floats(statcast_data.sort_values('game_date', ascending=False, kind='stable').head(10))
 
     for metric, (column, threshold) in RISK_FACTORS.items():
         if column in recent_data.columns:
@@ -79,6 +75,29 @@ def analyze_injury_risk(statcast_data):
     return risk_results
 
 
+def load_player_risk(player_info):
+    """Return (risk rows, injury history, precomputed-at timestamp or None) for a resolved player.
+
+    Rows precomputed by the nightly risk_store batch answer instantly; other players are
+    fetched live and written through to the store.
+    """
+    snapshot = risk_store.get_player_risk(player_info["statcast_id"])
+    if snapshot:
+        return snapshot["risk"], snapshot["injuries"], snapshot["computed_at"]
+
+    # Fetch Statcast Data and Injury History concurrently
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        statcast_future = pool.submit(tracing.propagate(fetch_statcast_data), player_info["statcast_id"])
+        injury_future = pool.submit(tracing.propagate(fetch_injury_history), player_info["id"])
+        statcast_data = statcast_future.result()
+        injury_history = injury_future.result()
+
+    risk_results = analyze_injury_risk(statcast_data)
+    if statcast_data is not None and injury_history is not None:
+        risk_store.save_player_risk(player_info["statcast_id"], player_info["name"], risk_results, injury_history)
+    return risk_results, injury_history, None
+
+
 def display_risk_details():
     """Streamlit UI for MLB Player Injury Risk Analysis"""
     st.title("⚾ MLB Player Injury Risk Analysis")
@@ -93,16 +112,10 @@ def display_risk_details():
         if player_info:
             st.success(f"✅ Player Found: {player_info['name']} (ID: {player_info['id']})")
 
-            # Fetch Statcast Data
-            with st.spinner("Fetching Statcast Metrics..."):
-                statcast_data = fetch_statcast_data(player_info["statcast_id"])
-
-            # Fetch Injury History
-            with st.spinner("Fetching Injury History..."):
-                injury_history = fetch_injury_history(player_info["id"])
-
-            # Perform Injury Risk Analysis
-            risk_results = analyze_injury_risk(statcast_data)
+            with st.spinner("Fetching Statcast Metrics and Injury History..."):
+                risk_results, injury_history, computed_at = load_player_risk(player_info)
+            if computed_at:
+                st.caption(f"Precomputed {pd.Timestamp(computed_at, unit='s'):%Y-%m-%d %H:%M} UTC")
 
             # Display Results
             if risk_results:
@@ -111,6 +124,11 @@ def display_risk_details():
             else:
                 st.success("✅ No significant injury risks detected.")
 
+            season_stats = risk_store.get_season_aggregates(player_info["statcast_id"])
+            if not season_stats.empty:
+                st.markdown("### 📈 Season Aggregates")
+                st.table(season_stats)
+
             # Display Injury History
             if injury_history:
                 st.markdown("### 📋 Past Injury History")
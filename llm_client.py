@@ -0,0 +1,160 @@
+import queue
+import asyncio
+import random
+import time
+import threading
+import contextvars
+import tracing
+
+# Constants
+MAX_IN_FLIGHT = 4  # concurrent model calls per process, across all sessions
+CALL_TIMEOUT = 300  # seconds per attempt, counted from when the call starts running
+MAX_RETRIES = 3
+BACKOFF_BASE = 1.0  # seconds
+BACKOFF_MAX = 30.0
+
+
+async def _in_context(context: contextvars.Context, coro):
+    """Run a coroutine on the client loop with the caller's context variables, so its spans join the caller's run"""
+    for var, value in context.items():
+        var.set(value)
+    return await coro
+
+
+class LLMClient:
+    """Shared client for GenerativeModel-like objects with retries, backoff and an in-flight limit.
+
+    The model is created by model_factory on first use, so tests can pass a local fake.
+    Every call runs through the model's async API on the client's own event loop thread,
+    behind one semaphore that is the process-wide in-flight limit shared by all Streamlit
+    sessions. A timed-out or abandoned call is cancelled, which frees its slot at once.
+    """
+
+    def __init__(self, model_factory, max_in_flight: int = MAX_IN_FLIGHT, timeout: float = CALL_TIMEOUT,
+                 max_retries: int = MAX_RETRIES, backoff_base: float = BACKOFF_BASE,
+                 backoff_max: float = BACKOFF_MAX):
+        self._model_factory = model_factory
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # gRPC async channels belong to the loop that created them, so all calls share this one
+        self._loop = asyncio.new_event_loop()
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-client", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Stop the client's event loop thread; the shared app client lives as long as the process"""
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _submit(self, coro):
+        """Schedule a coroutine on the client loop from any thread, returning a concurrent Future"""
+        return asyncio.run_coroutine_threadsafe(_in_context(contextvars.copy_context(), coro), self._loop)
+
+    async def _model(self):
+        # The factory may initialize credentials and Vertex AI, which blocks
+        return await self._loop.run_in_executor(None, self._model_factory)
+
+    async def _open_stream(self, contents, generation_config, safety_settings):
+        model = await self._model()
+        return await model.generate_content_async(
+            contents,
+            generation_config=generation_config,
+            safety_settings=safety_settings,
+            stream=True,
+        )
+
+    async def _call(self, contents, generation_config, safety_settings) -> str:
+        responses = await self._open_stream(contents, generation_config, safety_settings)
+        return "".join([chunk.text async for chunk in responses])
+
+    async def _run_in_slot(self, *args) -> str:
+        """Run one call in a free slot; the timeout starts once the slot is taken and cancels the call"""
+        async with self._slots:
+            with tracing.span("model_call"):
+                return await asyncio.wait_for(self._call(*args), self.timeout)
+
+    async def _generate(self, contents, generation_config, safety_settings, validate, description) -> str:
+        for attempt in range(self.max_retries):
+            try:
+                text = await self._run_in_slot(contents, generation_config, safety_settings)
+                if validate is not None:
+                    validate(text)
+                return text
+            except Exception as e:
+                if attempt == self.max_retries - 1:
+                    raise RuntimeError(f"{description} failed after {self.max_retries} attempts") from e
+                tracing.count("retries")
+                await asyncio.sleep(self.backoff_delay(attempt))
+
+    async def generate(self, contents, generation_config=None, safety_settings=None, validate=None,
+                       description: str = "Model call") -> str:
+        """Return the response text, retrying failures (including failed validate calls) with backoff"""
+        return await asyncio.wrap_future(
+            self._submit(self._generate(contents, generation_config, safety_settings, validate, description)))
+
+    async def generate_many(self, requests):
+        """Fan out several generate() calls at once; requests are dicts of generate() keyword arguments"""
+        return await asyncio.gather(*(self.generate(**request) for request in requests))
+
+    def generate_sync(self, contents, generation_config=None, safety_settings=None, validate=None,
+                      description: str = "Model call") -> str:
+        return self._submit(self._generate(contents, generation_config, safety_settings, validate,
+                                           description)).result()
+
+    def generate_many_sync(self, requests):
+        futures = [self._submit(self._generate(request["contents"], request.get("generation_config"),
+                                               request.get("safety_settings"), request.get("validate"),
+                                               request.get("description", "Model call")))
+                   for request in requests]
+        return [future.result() for future in futures]
+
+    async def _produce(self, chunks: queue.Queue, contents, generation_config, safety_settings):
+        """Feed one streamed response into chunks while holding a slot"""
+        async with self._slots:
+            chunks.put(("started", None))
+            try:
+                with tracing.span("model_stream"):
+                    responses = await self._open_stream(contents, generation_config, safety_settings)
+                    async for chunk in responses:
+                        chunks.put(("chunk", chunk.text))
+                chunks.put(("done", None))
+            except Exception as e:
+                chunks.put(("error", e))
+
+    def stream(self, contents, generation_config=None, safety_settings=None, description: str = "Model call"):
+        """Yield response text chunks as they arrive; only failures before the first chunk are retried.
+
+        Closing the generator, or a chunk timeout, cancels the model stream and frees its slot.
+        """
+        for attempt in range(self.max_retries):
+            chunks = queue.Queue()
+            producer = self._submit(self._produce(chunks, contents, generation_config, safety_settings))
+            started = False
+            try:
+                chunks.get()  # waiting for a free slot does not count against the timeout
+                while True:
+                    try:
+                        kind, payload = chunks.get(timeout=self.timeout)
+                    except queue.Empty:
+                        raise TimeoutError(f"No response chunk within {self.timeout} seconds")
+                    if kind == "error":
+                        raise payload
+                    if kind == "done":
+                        return
+                    started = True
+                    yield payload
+            except Exception as e:
+                if started or attempt == self.max_retries - 1:
+                    raise RuntimeError(f"{description} failed after {attempt + 1} attempts") from e
+            finally:
+                producer.cancel()
+            tracing.count("retries")
+            time.sleep(self.backoff_delay(attempt))
@@ -0,0 +1,197 @@
+import os
+import re
+import time
+import bisect
+import difflib
+import threading
+import unicodedata
+import pandas as pd
+import statsapi
+from pybaseball import chadwick_register
+from statcast_cache import CACHE_DIR
+
+# Constants
+REGISTRY_PATH = os.path.join(CACHE_DIR, "player_registry.parquet")
+REGISTRY_MAX_AGE = 24 * 60 * 60  # refresh the snapshot daily
+REGISTRY_RETRY = 5 * 60  # seconds before retrying a refresh that fell back to a stale or empty registry
+FIRST_STATCAST_SEASON = 2015
+ROSTER_SEASONS = 3  # seasons of MLB API rosters used for positions and preferred spellings
+NAME_SUFFIXES = {"jr", "sr", "ii", "iii", "iv"}
+FUZZY_CUTOFF = 0.85
+
+_registry = None
+_registry_expires = 0.0
+_registry_lock = threading.Lock()
+
+
+def normalize_name(name: str) -> str:
+    """Fold accents, case, punctuation and generational suffixes out of a player name"""
+    folded = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode()
+    folded = folded.lower().replace(".", "").replace("'", "")
+    tokens = [token for token in re.sub(r"[^a-z0-9]+", " ", folded).split() if token not in NAME_SUFFIXES]
+    # Spaced initials ("J. D.") collapse to the compact form ("jd")
+    return re.sub(r"\b(\w) (?=\w\b)", r"\1", " ".join(tokens))
+
+
+def _mlb_api_players():
+    """Players from recent MLB API season rosters, with positions"""
+    rows = []
+    current_season = pd.Timestamp.today().year
+    for season in range(current_season - ROSTER_SEASONS + 1, current_season + 1):
+        try:
+            people = statsapi.get("sports_players", {"sportId": 1, "season": season}).get("people", [])
+        except Exception:
+            continue
+        for person in people:
+            rows.append({
+                "name": person["fullName"],
+                "mlb_id": int(person["id"]),
+                "position": person.get("primaryPosition", {}).get("abbreviation", "N/A"),
+                "last_season": season,
+            })
+    return pd.DataFrame(rows, columns=["name", "mlb_id", "position", "last_season"])
+
+
+def _chadwick_players():
+    """Every Statcast-era player in the Chadwick register, without positions"""
+    register = chadwick_register()
+    register = register[(register["key_mlbam"] > 0) & (register["mlb_played_last"] >= FIRST_STATCAST_SEASON)]
+    return pd.DataFrame({
+        "name": register["name_first"].fillna("") + " " + register["name_last"].fillna(""),
+        "mlb_id": register["key_mlbam"].astype(int),
+        "position": "N/A",
+        "last_season": register["mlb_played_last"].astype(int),
+    })
+
+
+def _load_players():
+    """Return the player table, from the local snapshot when it is fresh enough.
+
+    When both sources fail, a stale snapshot is still better than an empty registry.
+    """
+    has_snapshot = os.path.exists(REGISTRY_PATH)
+    if has_snapshot and time.time() - os.path.getmtime(REGISTRY_PATH) < REGISTRY_MAX_AGE:
+        return pd.read_parquet(REGISTRY_PATH)
+
+    frames = [_mlb_api_players()]
+    try:
+        frames.append(_chadwick_players())
+    except Exception:
+        pass
+
+    # MLB API rows come first so their spelling and position win over the register
+    players = pd.concat(frames, ignore_index=True).drop_duplicates("mlb_id", keep="first")
+    if players.empty:
+        return pd.read_parquet(REGISTRY_PATH) if has_snapshot else players
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{REGISTRY_PATH}.{os.getpid()}.tmp"
+    players.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, REGISTRY_PATH)
+    return players
+
+
+class PlayerRegistry:
+    """In-memory player index keyed by normalized name"""
+
+    def __init__(self, players: pd.DataFrame):
+        self._by_name = {}
+        self._by_last_name = {}
+
+        # Most recent players first, so shared names resolve to the active player
+        for row in players.sort_values("last_season", ascending=False).itertuples(index=False):
+            key = normalize_name(row.name)
+            if not key:
+                continue
+            record = {
+                "name": row.name.strip(),
+                "mlbam_id": int(row.mlb_id),
+                "mlb_id": int(row.mlb_id),
+                "position": row.position,
+            }
+            self._by_name.setdefault(key, record)
+            self._by_last_name.setdefault(key.split()[-1], []).append(record)
+
+        self._keys = sorted(self._by_name)
+
+    def __len__(self):
+        return len(self._by_name)
+
+    def _prefix_match(self, key):
+        """Complete a partial name, only when exactly one player's name starts with it"""
+        index = bisect.bisect_left(self._keys, key)
+        matches = [candidate for candidate in self._keys[index:index + 2] if candidate.startswith(key)]
+        return self._by_name[matches[0]] if len(matches) == 1 else None
+
+    def resolve(self, name: str):
+        """Resolve a name to a player record, or None when nothing matches"""
+        key = normalize_name(name)
+        if not key:
+            return None
+
+        if key in self._by_name:
+            return self._by_name[key]
+
+        match = self._prefix_match(key)
+        if match:
+            return match
+
+        # A lone surname only resolves when it is unambiguous
+        same_last = self._by_last_name.get(key, [])
+        if len(same_last) == 1:
+            return same_last[0]
+
+        close = difflib.get_close_matches(key, self._keys, n=1, cutoff=FUZZY_CUTOFF)
+        return self._by_name[close[0]] if close else None
+
+    def resolve_many(self, names):
+        """Resolve several names at once, returning a name -> record mapping"""
+        return {name: self.resolve(name) for name in names}
+
+
+def _refresh(stale):
+    """Replace the registry with a fresh build, unless another refresh already replaced stale"""
+    global _registry, _registry_expires
+    with _registry_lock:
+        if _registry is not stale:
+            return
+        registry = PlayerRegistry(_load_players())
+        # Expires with the snapshot it was built from, but stale or failed refreshes wait REGISTRY_RETRY
+        snapshot_expires = os.path.getmtime(REGISTRY_PATH) + REGISTRY_MAX_AGE if os.path.exists(REGISTRY_PATH) else 0
+        _registry, _registry_expires = registry, max(snapshot_expires, time.time() + REGISTRY_RETRY)
+
+
+def _refresh_in_background(stale):
+    threading.Thread(target=_refresh, args=(stale,), name="player-registry", daemon=True).start()
+
+
+def get_registry() -> PlayerRegistry:
+    """Return the process-wide registry without touching the network on the caller's thread.
+
+    The registry is warmed in the background when this module is imported, so only a caller
+    arriving before that first build waits for it. Once the registry ages out, a background
+    thread rebuilds it while callers keep resolving against the current one.
+    """
+    global _registry_expires
+    registry = _registry
+    if registry is None:
+        _refresh(None)
+        return _registry
+    if time.time() >= _registry_expires:
+        _registry_expires = time.time() + REGISTRY_RETRY  # one rebuild at a time; it sets the real expiry
+        _refresh_in_background(registry)
+    return registry
+
+
+def resolve_player(name: str):
+    """Resolve one player name without any network round trip"""
+    return get_registry().resolve(name)
+
+
+def resolve_players(names):
+    """Resolve a batch of player names in one call"""
+    return get_registry().resolve_many(names)
+
+
+# Warmed off the request path at import, so the first analysis rarely waits for the network
+_refresh_in_background(None)
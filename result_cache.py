@@ -0,0 +1,73 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from contextlib import contextmanager
+from statcast_cache import CACHE_DIR
+import tracing
+
+# Constants
+RESULT_CACHE_PATH = os.path.join(CACHE_DIR, "llm_results.sqlite")
+RESULT_TTL = int(os.environ.get("STATVISION_RESULT_TTL", 7 * 24 * 60 * 60))  # one week
+RESULT_CACHE_MAX_BYTES = int(os.environ.get("STATVISION_RESULT_CACHE_MAX_BYTES", 512 * 1024 ** 2))
+
+_write_lock = threading.Lock()
+
+
+@contextmanager
+def _connect():
+    os.makedirs(os.path.dirname(RESULT_CACHE_PATH), exist_ok=True)
+    conn = sqlite3.connect(RESULT_CACHE_PATH, timeout=30)
+    try:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def make_key(*parts) -> str:
+    """Hash model inputs (URL or text, prompt, model name, generation config) into a cache key"""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get(key: str):
+    """Return the cached result for a key, or None when missing or expired"""
+    now = time.time()
+    with _write_lock, _connect() as conn:
+        row = conn.execute("SELECT value, created_at FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if now - row[1] > RESULT_TTL:
+            conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            return None
+        conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+        tracing.count("cache_hits")
+        return json.loads(row[0])
+
+
+def put(key: str, value):
+    """Store a result and evict expired, then least recently used, entries past the size cap"""
+    now = time.time()
+    encoded = json.dumps(value)
+    with _write_lock, _connect() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO results (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+            (key, encoded, len(encoded), now, now),
+        )
+        conn.execute("DELETE FROM results WHERE created_at < ?", (now - RESULT_TTL,))
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total > RESULT_CACHE_MAX_BYTES:
+            for old_key, size in conn.execute("SELECT key, size FROM results ORDER BY accessed_at").fetchall():
+                if total <= RESULT_CACHE_MAX_BYTES or old_key == key:
+                    break
+                conn.execute("DELETE FROM results WHERE key = ?", (old_key,))
+                total -= size
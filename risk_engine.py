@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+# Define Risk Factors
+RISK_FACTORS = {
+    "Exit Velocity Drop": ("launch_speed", 3),  # 3 mph drop
+    "Spin Rate Drop": ("release_spin_rate", 150),  # 150 rpm drop
+    "Pitch Velocity Drop": ("release_speed", 2),  # 2 mph drop
+    "Arm Angle Changes": ("arm_angle", 5),  # 5-degree change
+    "Sprint Speed Drop": ("sprint_speed", 0.5),  # 0.5 ft/sec drop
+}
+
+RECENT_WINDOW = 1  # newest games compared against the baseline
+BASELINE_WINDOW = 9  # games before them forming the baseline
+RISK_WINDOW_DAYS = 90  # trailing Statcast window the injury risk page and the nightly batch analyze
+RISK_TABLE_COLUMNS = ["player_id", "Metric", "Change", "Risk Level", "Severity", "Recent", "Baseline", "Samples"]
+
+
+def risk_window(days: int = RISK_WINDOW_DAYS):
+    """Return the (start, end) dates of the trailing risk window, ending today"""
+    end = pd.Timestamp.today().normalize()
+    return (end - pd.Timedelta(days=days)).strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+
+
+def scan_injury_risk(statcast_data: pd.DataFrame, recent_window: int = RECENT_WINDOW,
+                     baseline_window: int = BASELINE_WINDOW, per_game: bool = True,
+                     player_column: str = "batter", flagged_only: bool = True) -> pd.DataFrame:
+    """Compute every RISK_FACTORS delta for all players of a multi-player Statcast frame in one pass.
+
+    With per_game the frame is first reduced to one mean row per player and game day;
+    otherwise pitch rows are compared directly, like analyze_injury_risk. The mean of each
+    player's newest recent_window values is compared with the mean of the baseline_window
+    values before them, and the result is sorted by severity (|change| / threshold).
+    """
+    columns = [column for column, _ in RISK_FACTORS.values() if column in statcast_data.columns]
+    if statcast_data.empty or not columns:
+        return pd.DataFrame(columns=RISK_TABLE_COLUMNS)
+
+    frame = statcast_data[[player_column, "game_date", *columns]].copy()
+    frame["game_date"] = pd.to_datetime(frame["game_date"])
+    frame[columns] = frame[columns].astype("float64")
+
+    if per_game:
+        frame = frame.groupby([player_column, "game_date"], sort=False)[columns].mean().reset_index()
+
+    # Newest rows first within each player, limited to the rows the windows can use
+    frame = frame.sort_values([player_column, "game_date"], ascending=[True, False], kind="stable")
+    frame = frame[frame.groupby(player_column, sort=False).cumcount() < recent_window + baseline_window]
+
+    values = frame.melt(id_vars=[player_column], value_vars=columns, var_name="column").dropna(subset=["value"])
+    rank = values.groupby([player_column, "column"], sort=False).cumcount()
+    keys = [values[player_column], values["column"]]
+
+    recent = values["value"].where(rank < recent_window).groupby(keys).agg(["mean", "count"])
+    baseline = values["value"].where(rank >= recent_window).groupby(keys).agg(["mean", "count"])
+    table = baseline.join(recent, how="inner", rsuffix="_recent")
+    table = table[(table["count"] > 0) & (table["count_recent"] > 0)].reset_index()
+    if table.empty:
+        return pd.DataFrame(columns=RISK_TABLE_COLUMNS)
+
+    metric_by_column = {column: metric for metric, (column, _) in RISK_FACTORS.items()}
+    threshold_by_column = {column: threshold for column, threshold in RISK_FACTORS.values()}
+    thresholds = table["column"].map(threshold_by_column)
+    change = table["mean_recent"] - table["mean"]
+    severity = change.abs() / thresholds
+
+    result = pd.DataFrame({
+        "player_id": table[player_column],
+        "Metric": table["column"].map(metric_by_column),
+        "Change": change.round(2),
+        "Risk Level": np.where(change < 0, "High", "Moderate"),
+        "Severity": severity.round(2),
+        "Recent": table["mean_recent"].round(2),
+        "Baseline": table["mean"].round(2),
+        "Samples": (table["count"] + table["count_recent"]).astype(int),
+    })
+    if flagged_only:
+        result = result[change.abs() >= thresholds]
+    return result.sort_values(["Severity", "player_id"], ascending=[False, True], kind="stable").reset_index(drop=True)
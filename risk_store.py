@@ -0,0 +1,282 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import statsapi
+import tracing
+from statcast_cache import CACHE_DIR, load_statcast
+from risk_engine import BASELINE_WINDOW, RECENT_WINDOW, RISK_FACTORS, risk_window, scan_injury_risk
+
+# Constants
+STORE_PATH = os.path.join(CACHE_DIR, "risk_store.sqlite")
+STORE_MAX_AGE = 36 * 60 * 60  # a missed nightly run still serves yesterday's rows
+AGGREGATE_SEASONS = 2  # current and previous season
+BATCH_WORKERS = 8
+NIGHTLY_HOUR_UTC = 10  # 6 AM Eastern, once Savant has published the night's games
+NIGHTLY_CHECK = 15 * 60  # seconds between checks of the nightly schedule
+NIGHTLY_ENABLED = os.environ.get("STATVISION_NIGHTLY", "1") != "0"  # 0 when the batch is scheduled elsewhere
+RISK_COLUMNS = ["batter", "game_date", *[column for column, _ in RISK_FACTORS.values()]]
+AGGREGATE_COLUMNS = ["batter", "game_date", "launch_speed", "launch_angle", "release_speed", "release_spin_rate"]
+SEASON_COLUMNS = {
+    "season": "Season",
+    "pitches": "Pitches",
+    "games": "Games",
+    "batted_balls": "Batted Balls",
+    "avg_exit_velocity": "Avg Exit Velocity",
+    "max_exit_velocity": "Max Exit Velocity",
+    "avg_launch_angle": "Avg Launch Angle",
+    "avg_pitch_velocity": "Avg Pitch Velocity",
+    "avg_spin_rate": "Avg Spin Rate",
+}
+
+_write_lock = threading.Lock()
+_nightly_lock = threading.Lock()
+_nightly_thread = None
+
+
+@contextmanager
+def _connect():
+    os.makedirs(os.path.dirname(STORE_PATH), exist_ok=True)
+    conn = sqlite3.connect(STORE_PATH, timeout=30)
+    try:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS players ("
+            "player_id INTEGER PRIMARY KEY, name TEXT, injuries TEXT NOT NULL, computed_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS risk ("
+            "player_id INTEGER NOT NULL, metric TEXT NOT NULL, change REAL NOT NULL, risk_level TEXT NOT NULL, "
+            "severity REAL, recent REAL, baseline REAL, samples INTEGER, PRIMARY KEY (player_id, metric))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS season_stats ("
+            "player_id INTEGER NOT NULL, season INTEGER NOT NULL, pitches INTEGER, games INTEGER, "
+            "batted_balls INTEGER, avg_exit_velocity REAL, max_exit_velocity REAL, avg_launch_angle REAL, "
+            "avg_pitch_velocity REAL, avg_spin_rate REAL, PRIMARY KEY (player_id, season))"
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS runs (started_at REAL NOT NULL)")
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def season_aggregates(statcast_data: pd.DataFrame) -> pd.DataFrame:
+    """Per player and season pitch counts and batted-ball averages of a Statcast frame, in one groupby"""
+    if statcast_data.empty:
+        return pd.DataFrame(columns=["player_id", *SEASON_COLUMNS])
+
+    frame = statcast_data.reindex(columns=AGGREGATE_COLUMNS).astype({"launch_speed": "float64"})
+    frame["season"] = pd.to_datetime(frame["game_date"]).dt.year
+    aggregates = frame.groupby(["batter", "season"]).agg(
+        pitches=("game_date", "size"),
+        games=("game_date", "nunique"),
+        batted_balls=("launch_speed", "count"),
+        avg_exit_velocity=("launch_speed", "mean"),
+        max_exit_velocity=("launch_speed", "max"),
+        avg_launch_angle=("launch_angle", "mean"),
+        avg_pitch_velocity=("release_speed", "mean"),
+        avg_spin_rate=("release_spin_rate", "mean"),
+    )
+    return aggregates.round(2).reset_index().rename(columns={"batter": "player_id"})
+
+
+def _write_players(conn, players, risk: pd.DataFrame, seasons: pd.DataFrame, computed_at: float):
+    """Replace the stored rows of (player_id, name, injuries) players with freshly computed ones"""
+    player_ids = [(int(player_id),) for player_id, _, _ in players]
+    conn.executemany("DELETE FROM risk WHERE player_id = ?", player_ids)
+    conn.executemany(
+        "INSERT OR REPLACE INTO players (player_id, name, injuries, computed_at) VALUES (?, ?, ?, ?)",
+        [(int(player_id), name, json.dumps(injuries, default=str), computed_at) for player_id, name, injuries in players],
+    )
+    conn.executemany(
+        "INSERT INTO risk (player_id, metric, change, risk_level, severity, recent, baseline, samples) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        risk.astype(object).where(risk.notna(), None)[
+            ["player_id", "Metric", "Change", "Risk Level", "Severity", "Recent", "Baseline", "Samples"]
+        ].itertuples(index=False, name=None),
+    )
+    if not seasons.empty:
+        conn.executemany(
+            f"INSERT OR REPLACE INTO season_stats (player_id, {', '.join(SEASON_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * (len(SEASON_COLUMNS) + 1))})",
+            seasons.astype(object).where(seasons.notna(), None)[["player_id", *SEASON_COLUMNS]].itertuples(
+                index=False, name=None),
+        )
+
+
+def save_player_risk(player_id, name, risk_results, injuries):
+    """Store the result of a live risk analysis, so the next lookup of this player is instant"""
+    risk = pd.DataFrame(risk_results, columns=["Metric", "Change", "Risk Level"])
+    risk = risk.assign(player_id=int(player_id), Change=risk["Change"].astype(float),
+                       Severity=None, Recent=None, Baseline=None, Samples=None)
+    with _write_lock, _connect() as conn:
+        _write_players(conn, [(player_id, name, injuries)], risk, pd.DataFrame(), time.time())
+
+
+@tracing.traced("risk_store_lookup")
+def get_player_risk(player_id, max_age: float = STORE_MAX_AGE):
+    """Return a player's stored risk rows and injury history, or None when missing or stale.
+
+    Risk rows have the Metric, Change and Risk Level fields analyze_injury_risk returns.
+    """
+    with _connect() as conn:
+        player = conn.execute(
+            "SELECT injuries, computed_at FROM players WHERE player_id = ?", (int(player_id),)
+        ).fetchone()
+        if player is None or time.time() - player[1] > max_age:
+            return None
+        rows = conn.execute(
+            "SELECT metric, change, risk_level FROM risk WHERE player_id = ?", (int(player_id),)
+        ).fetchall()
+
+    tracing.count("cache_hits")
+    order = list(RISK_FACTORS)
+    rows.sort(key=lambda row: order.index(row[0]) if row[0] in order else len(order))
+    return {
+        "risk": [{"Metric": metric, "Change": f"{change:.2f}", "Risk Level": level} for metric, change, level in rows],
+        "injuries": json.loads(player[0]),
+        "computed_at": player[1],
+    }
+
+
+def get_season_aggregates(player_id) -> pd.DataFrame:
+    """Return a player's stored season aggregates, newest season first, with display headers"""
+    with _connect() as conn:
+        seasons = pd.read_sql_query(
+            f"SELECT {', '.join(SEASON_COLUMNS)} FROM season_stats WHERE player_id = ? ORDER BY season DESC",
+            conn, params=(int(player_id),),
+        )
+    return seasons.rename(columns=SEASON_COLUMNS)
+
+
+def active_roster(workers: int = BATCH_WORKERS) -> dict:
+    """Return {player_id: name} for every player on an active MLB roster"""
+    teams = statsapi.get("teams", {"sportId": 1}).get("teams", [])
+
+    def team_roster(team_id):
+        return statsapi.get("team_roster", {"teamId": team_id, "rosterType": "active"}).get("roster", [])
+
+    players = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for roster in pool.map(team_roster, [team["id"] for team in teams]):
+            for entry in roster:
+                players[int(entry["person"]["id"])] = entry["person"]["fullName"]
+    return players
+
+
+def _injury_history(player_id):
+    return statsapi.player_stat_data(player_id, group="health", type="career").get("stats", [])
+
+
+def _sync_player(player_id, season_start, today):
+    """Sync a player's new games through the Statcast cache and return (risk rows, seasons, injuries)"""
+    risk_data = load_statcast(player_id, *risk_window(), columns=RISK_COLUMNS)
+    season_data = load_statcast(player_id, season_start, today, columns=AGGREGATE_COLUMNS)
+    return risk_data, season_aggregates(season_data), _injury_history(player_id)
+
+
+def run_batch(players: dict = None, workers: int = BATCH_WORKERS) -> dict:
+    """Precompute risk rows, season aggregates and injury history for {player_id: name} players.
+
+    Defaults to every active roster. Statcast games already in the cache are not downloaded
+    again, so nightly runs only fetch the days since the previous run. Players whose sources
+    fail keep their previous rows.
+    """
+    players = active_roster(workers) if players is None else players
+    today = pd.Timestamp.today().normalize()
+    season_start = pd.Timestamp(year=today.year - AGGREGATE_SEASONS + 1, month=1, day=1)
+
+    synced, failed = [], {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {player_id: pool.submit(_sync_player, player_id, season_start, today) for player_id in players}
+        for player_id, future in futures.items():
+            try:
+                synced.append((player_id, *future.result()))
+            except Exception as e:
+                failed[player_id] = f"{type(e).__name__}: {e}"
+
+    # Risk for every synced player in one vectorized pass, with the page's pitch-level windows
+    frames = [risk_data for _, risk_data, _, _ in synced if not risk_data.empty]
+    risk = scan_injury_risk(pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(),
+                            recent_window=RECENT_WINDOW, baseline_window=BASELINE_WINDOW, per_game=False)
+    seasons = [aggregates for _, _, aggregates, _ in synced if not aggregates.empty]
+    seasons = pd.concat(seasons, ignore_index=True) if seasons else pd.DataFrame()
+
+    with _write_lock, _connect() as conn:
+        _write_players(conn, [(player_id, players[player_id], injuries) for player_id, _, _, injuries in synced],
+                       risk, seasons, time.time())
+
+    return {"players": len(players), "stored": len(synced), "flagged": len(risk), "failed": failed}
+
+
+def _nightly_due(now: pd.Timestamp) -> float:
+    """Timestamp of the latest scheduled nightly run at or before now"""
+    due = now.normalize() + pd.Timedelta(hours=NIGHTLY_HOUR_UTC)
+    return (due if due <= now else due - pd.Timedelta(days=1)).timestamp()
+
+
+def _claim_nightly_run(due: float) -> bool:
+    """Record a nightly run as started unless one started since due, in one write transaction.
+
+    The store is shared by every process using the cache, so only one of them runs each night.
+    """
+    with _connect() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        started_at = conn.execute("SELECT MAX(started_at) FROM runs").fetchone()[0]
+        if started_at is not None and started_at >= due:
+            return False
+        conn.execute("INSERT INTO runs (started_at) VALUES (?)", (time.time(),))
+    return True
+
+
+def _nightly_loop(workers: int):
+    while True:
+        try:
+            if _claim_nightly_run(_nightly_due(pd.Timestamp.now(tz="UTC"))):
+                with tracing.trace_run("risk_nightly"):
+                    summary = run_batch(workers=workers)
+                print(f"Nightly risk run stored {summary['stored']} of {summary['players']} players",
+                      file=sys.stderr)
+        except Exception as e:
+            # The next night's run retries; players that failed keep their previous rows until then
+            print(f"Nightly risk run failed: {type(e).__name__}: {e}", file=sys.stderr)
+        time.sleep(NIGHTLY_CHECK)
+
+
+def start_nightly(workers: int = BATCH_WORKERS):
+    """Run run_batch every day at NIGHTLY_HOUR_UTC in a daemon thread of this process.
+
+    A process started after a missed run catches up at once. Calling it again is a no-op, and
+    STATVISION_NIGHTLY=0 turns it off where the CLI below is scheduled instead.
+    """
+    global _nightly_thread
+    with _nightly_lock:
+        if not NIGHTLY_ENABLED or _nightly_thread is not None:
+            return
+        _nightly_thread = threading.Thread(target=_nightly_loop, args=(workers,), name="risk-nightly", daemon=True)
+        _nightly_thread.start()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Nightly precompute of injury risk and season aggregates")
+    parser.add_argument("--players", nargs="+", type=int, help="MLBAM ids to refresh instead of all active rosters")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS)
+    args = parser.parse_args(argv)
+
+    players = None if args.players is None else {player_id: None for player_id in args.players}
+    summary = run_batch(players, workers=args.workers)
+    print(f"Stored {summary['stored']} of {summary['players']} players, {summary['flagged']} risk rows flagged")
+    for player_id, error in summary["failed"].items():
+        print(f"Failed {player_id}: {error}")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
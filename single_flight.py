@@ -0,0 +1,145 @@
+import sys
+import time
+import functools
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+import pandas as pd
+import tracing
+
+# Constants
+SHARED_STORE_MAX_BYTES = 1024 ** 3  # 1 GB of the instance's 8 GB
+SHARED_TTL = 15 * 60  # seconds; the disk caches behind these calls keep data longer
+
+
+def estimate_size(value) -> int:
+    """Approximate in-memory size of a result, counting DataFrames deeply"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class LeaderAbandoned(Exception):
+    """Raised to waiters when the leader stopped without a result, e.g. its session closed; claim again"""
+
+
+class SingleFlight:
+    """Lets concurrent callers with the same key share one in-flight computation"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def claim(self, key):
+        """Return (future, is_leader); only the leader computes and must call finish()"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = self._calls[key] = Future()
+            return future, True
+
+    def finish(self, key, result=None, error=None):
+        """Hand the leader's result or error to the waiters.
+
+        Errors that are not Exceptions (GeneratorExit, KeyboardInterrupt, ...) belong to the
+        leader alone; waiters get LeaderAbandoned instead and retry.
+        """
+        with self._lock:
+            future = self._calls.pop(key)
+        if error is not None and not isinstance(error, Exception):
+            error = LeaderAbandoned(f"Shared call stopped by {type(error).__name__}")
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key, fn, *args, **kwargs):
+        future, leader = self.claim(key)
+        while not leader:
+            tracing.count("shared_waits")
+            try:
+                return future.result()
+            except LeaderAbandoned:
+                # The leader was interrupted: one waiter becomes the new leader, the others wait on it
+                future, leader = self.claim(key)
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self.finish(key, error=e)
+            raise
+        self.finish(key, result)
+        return result
+
+
+class SharedStore:
+    """Process-wide LRU result store bounded by estimated memory, readable by every session"""
+
+    def __init__(self, max_bytes: int = SHARED_STORE_MAX_BYTES, ttl: float = SHARED_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key):
+        """Return (hit, value)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            value, size, stored_at = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self._bytes -= size
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def put(self, key, value):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size, time.monotonic())
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+
+flight = SingleFlight()
+store = SharedStore()
+
+
+def shared(name: str):
+    """Deduplicate concurrent identical calls and keep non-None results in the shared store.
+
+    Results are shared between sessions, so callers must treat them as read-only.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (name, args, tuple(sorted(kwargs.items())))
+            hit, value = store.get(key)
+            if hit:
+                tracing.count("cache_hits")
+                return value
+
+            def compute():
+                result = fn(*args, **kwargs)
+                if result is not None:
+                    store.put(key, result)
+                return result
+
+            return flight.do(key, compute)
+        return wrapper
+    return decorator
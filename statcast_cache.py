@@ -0,0 +1,365 @@
+import os
+import json
+import time
+import random
+import shutil
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import pandas as pd
+import pyarrow.parquet as pq
+from pybaseball import statcast_batter
+import tracing
+
+try:
+    import fcntl
+except ImportError:  # Windows: locks only cover threads of one process
+    fcntl = None
+
+# Constants
+CACHE_DIR = os.environ.get("STATVISION_CACHE_DIR", os.path.join(os.getcwd(), ".statcast_cache"))
+MAX_CACHE_BYTES = int(os.environ.get("STATVISION_CACHE_MAX_BYTES", 20 * 1024 ** 3))  # 20 GB of the 30 GB disk
+MANIFEST_FILE = "manifest.json"
+LOCK_DIR = "locks"  # lock files shared with batch processes (risk_store.py, batch.py) using the same cache
+DATE_FORMAT = "%Y-%m-%d"
+SHARD_SIZE = "month"  # default split of downloads; None sends each missing range as one request
+SHARD_STARTS = {"week": "W-MON", "month": "MS"}
+SHARD_WORKERS = 6  # concurrent Statcast requests per process, across all players
+SHARD_RETRIES = 3
+SHARD_BACKOFF = 1.0  # seconds
+TODAY_TTL = 15 * 60  # seconds a sync of possibly unfinished game days is served before refetching
+FINAL_LAG_DAYS = 1  # a game day's rows are final once a sync ran this many days after it
+
+_manifest_lock = threading.Lock()
+_player_locks = {}
+_shard_pool = ThreadPoolExecutor(max_workers=SHARD_WORKERS, thread_name_prefix="statcast-shard")
+
+
+def _player_lock(player_id):
+    """Return the lock serializing syncs of a single player"""
+    with _manifest_lock:
+        return _player_locks.setdefault(str(player_id), threading.Lock())
+
+
+def _flock(name, blocking=True):
+    """Take an exclusive lock on a lock file under CACHE_DIR, serializing processes that share the cache.
+
+    Returns the open lock file to pass to _funlock, None without fcntl, or False when blocking
+    is off and another process holds the lock.
+    """
+    if fcntl is None:
+        return None
+    os.makedirs(os.path.join(CACHE_DIR, LOCK_DIR), exist_ok=True)
+    lock_file = open(os.path.join(CACHE_DIR, LOCK_DIR, f"{name}.lock"), "a")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+    except BlockingIOError:
+        lock_file.close()
+        return False
+    return lock_file
+
+
+def _funlock(lock_file):
+    if lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        lock_file.close()
+
+
+@contextmanager
+def _locked(thread_lock, name):
+    """Hold a thread lock and the lock file of the same name, so threads and processes are both excluded"""
+    with thread_lock:
+        lock_file = _flock(name)
+        try:
+            yield
+        finally:
+            _funlock(lock_file)
+
+
+def _player_dir(player_id):
+    return os.path.join(CACHE_DIR, f"player={player_id}")
+
+
+def _read_manifest():
+    path = os.path.join(CACHE_DIR, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(manifest):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = os.path.join(CACHE_DIR, MANIFEST_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def _final_day(entry):
+    """Last synced day whose games were finished and published when it was synced"""
+    synced_end = pd.Timestamp(entry["end"])
+    if "synced_at" not in entry:
+        return synced_end - pd.Timedelta(days=1)
+    synced_on = pd.Timestamp.fromtimestamp(entry["synced_at"]).normalize()
+    return min(synced_end, synced_on - pd.Timedelta(days=FINAL_LAG_DAYS))
+
+
+def _synced_end(entry):
+    """Last day of an entry's synced range that is still fresh.
+
+    Days after the entry's final day may have been synced before their games finished, so
+    once the sync is older than TODAY_TTL they count as unsynced, even on later days.
+    """
+    synced_end = pd.Timestamp(entry["end"])
+    if time.time() - entry.get("synced_at", 0) > TODAY_TTL:
+        synced_end = _final_day(entry)
+    return synced_end
+
+
+def _missing_ranges(entry, start, end):
+    """Return the (start, end) date ranges not yet covered by a player's synced range"""
+    if entry is None:
+        return [(start, end)] if start <= end else []
+
+    synced_start = pd.Timestamp(entry["start"])
+    synced_end = _synced_end(entry)
+    ranges = []
+    if start < synced_start:
+        ranges.append((start, synced_start - pd.Timedelta(days=1)))
+    if end > synced_end:
+        ranges.append((synced_end + pd.Timedelta(days=1), end))
+    return [(s, e) for s, e in ranges if s <= e]
+
+
+def _write_partitions(player_id, data, start, end):
+    """Merge freshly fetched rows into the player's monthly Parquet partitions"""
+    player_dir = _player_dir(player_id)
+    os.makedirs(player_dir, exist_ok=True)
+
+    data = data.copy()
+    data["game_date"] = pd.to_datetime(data["game_date"])
+    months = pd.period_range(start, end, freq="M")
+
+    for month in months:
+        path = os.path.join(player_dir, f"{month}.parquet")
+        new_rows = data[data["game_date"].dt.to_period("M") == month]
+
+        if os.path.exists(path):
+            existing = pd.read_parquet(path)
+            # Days inside the refetched range are replaced, so partial game days never duplicate
+            keep = (existing["game_date"] < start) | (existing["game_date"] > end)
+            new_rows = pd.concat([existing[keep], new_rows], ignore_index=True)
+
+        if not new_rows.empty:
+            # Replaced in one step, so readers in this or another process never see a partial file
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            new_rows.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+
+def _shards(start, end, shard=SHARD_SIZE):
+    """Split a date range into week or month shards; shards never cross a month, so each feeds one partition"""
+    if shard is None:
+        return [(start, end)]
+    starts = sorted({start, *pd.date_range(start, end, freq="MS"),
+                     *pd.date_range(start, end, freq=SHARD_STARTS[shard])})
+    ends = [next_start - pd.Timedelta(days=1) for next_start in starts[1:]] + [end]
+    return list(zip(starts, ends))
+
+
+def _fetch_shard(player_id, shard_start, shard_end):
+    """Download one shard, retrying it alone with jittered backoff"""
+    for attempt in range(SHARD_RETRIES):
+        try:
+            with tracing.span("statcast_batter", start=shard_start.strftime(DATE_FORMAT),
+                              end=shard_end.strftime(DATE_FORMAT)) as stage:
+                data = statcast_batter(shard_start.strftime(DATE_FORMAT), shard_end.strftime(DATE_FORMAT), player_id)
+                if data is None or data.empty:
+                    data = pd.DataFrame(columns=["game_date"])
+                stage.set(rows=len(data))
+            return data
+        except Exception:
+            if attempt == SHARD_RETRIES - 1:
+                raise
+            tracing.count("retries")
+            time.sleep(random.uniform(0, SHARD_BACKOFF * 2 ** attempt))
+
+
+def _download(player_id, ranges, shard=SHARD_SIZE):
+    """Fetch missing ranges as parallel shards, writing each month's partition as soon as its shards arrive.
+
+    Only one month of downloaded rows is held in memory at a time per player. Raises after
+    the remaining shards finish when any shard still fails after its retries; the months
+    already written are replaced again by the next sync.
+    """
+    units = {}
+    for index, (range_start, range_end) in enumerate(ranges):
+        for shard_start, shard_end in _shards(range_start, range_end, shard):
+            month = shard_start.to_period("M") if shard else None
+            units.setdefault((index, month), []).append((shard_start, shard_end))
+
+    futures = {}
+    for unit, unit_shards in units.items():
+        for shard_start, shard_end in unit_shards:
+            future = _shard_pool.submit(tracing.propagate(_fetch_shard), player_id, shard_start, shard_end)
+            futures[future] = unit
+
+    received = {unit: [] for unit in units}
+    errors = []
+    for future in as_completed(futures):
+        unit = futures[future]
+        try:
+            received[unit].append(future.result())
+        except Exception as e:
+            errors.append(e)
+            continue
+        if len(received[unit]) == len(units[unit]):
+            frames = [data for data in received.pop(unit) if not data.empty]
+            data = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["game_date"])
+            _write_partitions(str(player_id), data, units[unit][0][0], units[unit][-1][1])
+
+    if errors:
+        raise RuntimeError(f"{len(errors)} of {len(futures)} Statcast shards failed for player {player_id}") \
+            from errors[0]
+
+
+def _read_partitions(player_id, start, end, columns=None, dtype_backend=None):
+    player_dir = _player_dir(player_id)
+    read_columns = None if columns is None else list(dict.fromkeys([*columns, "game_date"]))
+    read_options = {"memory_map": True}
+    if dtype_backend:
+        read_options["dtype_backend"] = dtype_backend
+
+    frames = []
+    for month in pd.period_range(start, end, freq="M"):
+        path = os.path.join(player_dir, f"{month}.parquet")
+        if not os.path.exists(path):
+            continue
+        try:
+            # Requested columns Statcast never returned for this month are skipped, not errors
+            available = None if read_columns is None else \
+                [column for column in read_columns if column in pq.read_schema(path).names]
+            frames.append(pd.read_parquet(path, columns=available, **read_options))
+        except FileNotFoundError:
+            continue  # evicted by another process since the check
+
+    if not frames:
+        return pd.DataFrame(columns=columns)
+
+    data = pd.concat(frames, ignore_index=True)
+    in_range = (data["game_date"] >= start) & (data["game_date"] <= end)
+    data = data[in_range].reset_index(drop=True)
+    return data if columns is None else data[[column for column in columns if column in data.columns]]
+
+
+def _covered_range(entry, ranges):
+    """Synced (start, end) once ranges are downloaded on top of a manifest entry.
+
+    The longest contiguous span of the entry's range and the downloaded ranges is kept, so
+    days whose partitions are not on disk are never claimed as synced.
+    """
+    spans = sorted([*ranges, *([] if entry is None else [(pd.Timestamp(entry["start"]),
+                                                           pd.Timestamp(entry["end"]))])])
+    merged = [list(spans[0])]
+    for span_start, span_end in spans[1:]:
+        if span_start <= merged[-1][1] + pd.Timedelta(days=1):
+            merged[-1][1] = max(merged[-1][1], span_end)
+        else:
+            merged.append([span_start, span_end])
+    return max(merged, key=lambda span: span[1] - span[0])
+
+
+def _evict(manifest, keep_player):
+    """Drop least recently used players until the cache fits MAX_CACHE_BYTES.
+
+    Must be called with the manifest locked. Players being synced, in this or another process,
+    are skipped; the player locks of evicted players are returned still held, and must be
+    released once the manifest without them is written, so a waiting sync never trusts a
+    deleted entry.
+    """
+    total = sum(entry.get("bytes", 0) for entry in manifest.values())
+    by_age = sorted(manifest.items(), key=lambda item: item[1].get("last_access", 0))
+
+    held = []
+    for player_id, entry in by_age:
+        if total <= MAX_CACHE_BYTES:
+            break
+        if player_id == keep_player:
+            continue
+        lock = _player_locks.setdefault(player_id, threading.Lock())
+        if not lock.acquire(blocking=False):
+            continue
+        lock_file = _flock(f"player={player_id}", blocking=False)
+        if lock_file is False:
+            lock.release()
+            continue
+        held.append((lock, lock_file))
+        shutil.rmtree(_player_dir(player_id), ignore_errors=True)
+        total -= entry.get("bytes", 0)
+        del manifest[player_id]
+    return held
+
+
+def load_statcast(player_id, start_date, end_date, columns=None, dtype_backend=None, shard=SHARD_SIZE):
+    """Return a player's Statcast rows between two dates, syncing missing game days first.
+
+    Rows are stored as Parquet under CACHE_DIR, partitioned by player and game month.
+    Only days outside the player's synced range are downloaded, as parallel "week" or
+    "month" shards; games on or after the day of a sync may have been unfinished or not yet
+    published, so those days are refetched by the first sync more than TODAY_TTL later. Reads are memory-mapped and only decode
+    the requested columns; dtype_backend="pyarrow" returns Arrow-backed columns.
+    """
+    key = str(player_id)
+    start = pd.Timestamp(start_date).normalize()
+    end = pd.Timestamp(end_date).normalize()
+    today = pd.Timestamp.today().normalize()
+
+    with _locked(_player_lock(key), f"player={key}"):
+        with _locked(_manifest_lock, "manifest"):
+            entry = _read_manifest().get(key)
+
+        # Days after today have no games yet, so they are never downloaded
+        ranges = _missing_ranges(entry, start, min(end, today))
+        fetched = bool(ranges)
+        if not fetched:
+            tracing.count("cache_hits")
+        else:
+            _download(player_id, ranges, shard)
+
+        with _locked(_manifest_lock, "manifest"):
+            manifest = _read_manifest()
+            held = []
+            if fetched:
+                # Built on the entry as it is now, in case it changed or was evicted during the download
+                synced_start, synced_end = _covered_range(manifest.get(key), ranges)
+                manifest[key] = {
+                    "start": synced_start.strftime(DATE_FORMAT),
+                    "end": synced_end.strftime(DATE_FORMAT),
+                    "synced_at": time.time(),
+                    "bytes": _dir_size(_player_dir(key)),
+                }
+            if key in manifest:
+                manifest[key]["last_access"] = time.time()
+                if fetched:
+                    held = _evict(manifest, key)
+                _write_manifest(manifest)
+            for lock, lock_file in held:
+                _funlock(lock_file)
+                lock.release()
+
+        return _read_partitions(key, start, end, columns=columns, dtype_backend=dtype_backend)
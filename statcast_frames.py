@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from statcast_cache import load_statcast
+from risk_engine import RISK_FACTORS
+from statcast_metrics import METRIC_COLUMNS
+
+# Columns read by the Home page table, plots and batted-ball metrics, and by the injury risk analysis
+HOME_COLUMNS = ['game_date', 'pitch_type', 'release_speed', 'launch_speed',
+                'launch_angle', 'arm_angle', 'release_spin_rate']
+RISK_COLUMNS = ['batter', 'game_date', *[column for column, _ in RISK_FACTORS.values()]]
+COMPACT_COLUMNS = list(dict.fromkeys(HOME_COLUMNS + METRIC_COLUMNS + RISK_COLUMNS))
+
+
+def compact_statcast(data: pd.DataFrame, columns=COMPACT_COLUMNS) -> pd.DataFrame:
+    """Project a Statcast frame onto the used columns with float32, small integer and categorical dtypes.
+
+    Arrow-backed columns stay Arrow-backed, with floats narrowed to float32.
+    """
+    compact = {}
+    for column in columns:
+        if column not in data.columns:
+            continue
+        series = data[column]
+        dtype = series.dtype
+
+        if column == 'game_date':
+            compact[column] = series if isinstance(dtype, pd.ArrowDtype) else pd.to_datetime(series)
+        elif isinstance(dtype, pd.ArrowDtype):
+            is_float = pa.types.is_floating(dtype.pyarrow_dtype)
+            compact[column] = series.astype(pd.ArrowDtype(pa.float32())) if is_float else series
+        elif pd.api.types.is_float_dtype(dtype):
+            compact[column] = series.astype('float32')
+        elif pd.api.types.is_integer_dtype(dtype):
+            compact[column] = pd.to_numeric(series, downcast='integer')
+        elif pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+            compact[column] = series.astype('category')
+        else:
+            compact[column] = series
+
+    return pd.DataFrame(compact, index=data.index)
+
+
+def widen_floats(data: pd.DataFrame) -> pd.DataFrame:
+    """Restore float32 columns to the float64 values they were narrowed from.
+
+    Statcast values carry far fewer than float32's 7 significant digits, so the shortest
+    float32 repr is the original decimal; reparsing it gives back the exact float64.
+    Meant for the small slices shown in tables or fed to the risk thresholds.
+    """
+    float32_columns = [column for column in data.columns if str(data[column].dtype) in ('float32', 'float[pyarrow]')]
+    if not float32_columns:
+        return data
+    widened = data.copy()
+    for column in float32_columns:
+        values = pd.Series(data[column].to_numpy(dtype='float32', na_value=np.nan), index=data.index)
+        widened[column] = pd.to_numeric(values.astype(str), errors='coerce').astype('float64')
+    return widened
+
+
+def load_compact_statcast(player_id, start_date, end_date, columns=COMPACT_COLUMNS, dtype_backend=None):
+    """Read only the used columns of a player's cached Statcast rows, in compact dtypes"""
+    data = load_statcast(player_id, start_date, end_date, columns=columns, dtype_backend=dtype_backend)
+    return compact_statcast(data, columns=columns)
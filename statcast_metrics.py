@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+
+# Constants
+HARD_HIT_SPEED = 95  # mph
+SWEET_SPOT_ANGLES = (8, 32)  # degrees, inclusive
+ADJUSTED_EV_FLOOR = 88  # mph
+BARREL_CODE = 6  # launch_speed_angle bucket Statcast assigns to barrels
+ROLLING_DAYS = 30
+METRIC_COLUMNS = ['batter', 'game_date', 'game_year', 'type', 'launch_speed', 'launch_angle', 'launch_speed_angle']
+METRIC_NAMES = {
+    "bbe": "BBE",
+    "avg_exit_velocity": "Avg EV",
+    "max_exit_velocity": "Max EV",
+    "ev50": "EV50",
+    "adjusted_ev": "Adjusted EV",
+    "hard_hit_pct": "Hard Hit %",
+    "sweet_spot_pct": "Sweet Spot %",
+    "barrels": "Barrels",
+    "barrel_pct": "Barrel %",
+}
+
+
+def _float_values(data: pd.DataFrame, column: str) -> np.ndarray:
+    if column not in data.columns:
+        return np.full(len(data), np.nan)
+    return data[column].to_numpy(dtype='float64', na_value=np.nan)
+
+
+def _top_half_mean(values: np.ndarray) -> float:
+    """Mean of the hardest half of a group's exit velocities, selected with a partition instead of a sort"""
+    top = len(values) // 2  # the hardest ceil(n / 2) values sit at and after this position
+    return float(np.partition(values, top)[top:].mean())
+
+
+def _aggregate(data: pd.DataFrame, keys: dict) -> pd.DataFrame:
+    """Batted-ball quality of data grouped by {name: per-row values}, in one groupby pass"""
+    speed = _float_values(data, 'launch_speed')
+    angle = _float_values(data, 'launch_angle')
+    batted = ~np.isnan(speed)
+    if 'type' in data.columns:
+        batted &= (data['type'] == 'X').to_numpy(dtype=bool, na_value=False)
+
+    speed = speed[batted]
+    angle = angle[batted]
+    frame = pd.DataFrame({
+        **{name: np.asarray(values)[batted] for name, values in keys.items()},
+        "speed": speed,
+        "adjusted": np.maximum(speed, ADJUSTED_EV_FLOOR),
+        "hard_hit": speed >= HARD_HIT_SPEED,
+        "sweet_spot": (angle >= SWEET_SPOT_ANGLES[0]) & (angle <= SWEET_SPOT_ANGLES[1]),
+        "barrel": _float_values(data, 'launch_speed_angle')[batted] == BARREL_CODE,
+    })
+    if frame.empty:
+        return pd.DataFrame(columns=[*keys, *METRIC_NAMES])
+
+    grouped = frame.groupby(list(keys), sort=False)
+    table = grouped.agg(
+        bbe=("speed", "size"),
+        avg_exit_velocity=("speed", "mean"),
+        max_exit_velocity=("speed", "max"),
+        adjusted_ev=("adjusted", "mean"),
+        hard_hit_pct=("hard_hit", "mean"),
+        sweet_spot_pct=("sweet_spot", "mean"),
+        barrels=("barrel", "sum"),
+        barrel_pct=("barrel", "mean"),
+    )
+    speeds = frame["speed"].to_numpy()
+    ev50 = {key: _top_half_mean(speeds[positions]) for key, positions in grouped.indices.items()}
+    table["ev50"] = [ev50[key] for key in table.index]
+    for column in ("hard_hit_pct", "sweet_spot_pct", "barrel_pct"):
+        table[column] *= 100
+    return table[list(METRIC_NAMES)].round(1).reset_index()
+
+
+def player_metrics(data: pd.DataFrame, player_column: str = 'batter') -> pd.DataFrame:
+    """EV50, Adjusted EV, Hard Hit, Sweet Spot and Barrel rates per player of a multi-player Statcast frame"""
+    return _aggregate(data, {player_column: data[player_column].to_numpy()})
+
+
+def season_metrics(data: pd.DataFrame, player_column: str = 'batter') -> pd.DataFrame:
+    """player_metrics split by player and season"""
+    if 'game_year' in data.columns:
+        seasons = data['game_year'].to_numpy()
+    else:
+        seasons = pd.to_datetime(data['game_date']).dt.year.to_numpy()
+    return _aggregate(data, {player_column: data[player_column].to_numpy(), "season": seasons})
+
+
+def rolling_metrics(data: pd.DataFrame, days: int = ROLLING_DAYS, player_column: str = 'batter') -> pd.DataFrame:
+    """player_metrics over each player's trailing days, ending at that player's latest game"""
+    if data.empty:
+        return _aggregate(data, {player_column: data[player_column].to_numpy()})
+    dates = pd.to_datetime(data['game_date'])
+    latest = dates.groupby(data[player_column].to_numpy(), sort=False).transform('max')
+    recent = data[(dates > latest - pd.Timedelta(days=days)).to_numpy()]
+    return player_metrics(recent, player_column)
+
+
+def comparison_table(data: pd.DataFrame, names: dict, days: int = ROLLING_DAYS,
+                     player_column: str = 'batter') -> pd.DataFrame:
+    """Side-by-side metrics of {player_id: name} players, with a recent-window row and one row per season"""
+    rolling = rolling_metrics(data, days, player_column).assign(split=f"Last {days} days", order=0)
+    seasons = season_metrics(data, player_column)
+    seasons = seasons.assign(split=seasons.pop("season").astype(str), order=1)
+    table = pd.concat([rolling, seasons], ignore_index=True)
+    table = table[table[player_column].isin(list(names))]
+    if table.empty:
+        return pd.DataFrame(columns=["Player", "Split", *METRIC_NAMES.values()])
+
+    # Only the aggregated rows are ordered: players as given, recent window first, newest season next
+    player_order = {player_id: position for position, player_id in enumerate(names)}
+    table = table.assign(position=table[player_column].map(player_order))
+    table = table.sort_values(["position", "order", "split"], ascending=[True, True, False], kind="stable")
+    table.insert(0, "Player", table[player_column].map(names))
+    table = table.rename(columns={"split": "Split", **METRIC_NAMES})
+    return table[["Player", "Split", *METRIC_NAMES.values()]].reset_index(drop=True)
@@ -0,0 +1,87 @@
+import io
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+import tracing
+
+# Constants
+FIGSIZE = (10, 6)
+DPI = 100
+HIST_BINS = 20
+DENSITY_BINS = (60, 40)  # spin rate x velocity cells of the binned scatter
+PLOT_CACHE_ENTRIES = 128
+
+_plot_cache = OrderedDict()
+_plot_cache_lock = threading.Lock()
+
+
+def data_version(data: pd.DataFrame) -> str:
+    """Cheap fingerprint that changes whenever the cache syncs new game days into a frame"""
+    last_game = data['game_date'].max() if 'game_date' in data.columns and not data.empty else None
+    return f"{len(data)}:{last_game}"
+
+
+def _finite_values(data, *columns):
+    values = np.column_stack([data[column].to_numpy(dtype='float64', na_value=np.nan) for column in columns])
+    return values[np.isfinite(values).all(axis=1)]
+
+
+def _draw_exit_velocity(fig, data):
+    ax = fig.subplots()
+    ax.hist(_finite_values(data, 'launch_speed')[:, 0], bins=HIST_BINS, color='blue', alpha=0.7)
+    ax.set_title('Exit Velocity Distribution')
+    ax.set_xlabel('MPH')
+    ax.grid(True)
+
+
+def _draw_spin_rate(fig, data):
+    """Binned density instead of one marker per pitch, so drawing cost does not grow with pitch count"""
+    ax = fig.subplots()
+    values = _finite_values(data, 'release_spin_rate', 'release_speed')
+    if len(values):
+        counts, spin_edges, speed_edges = np.histogram2d(values[:, 0], values[:, 1], bins=DENSITY_BINS)
+        mesh = ax.pcolormesh(spin_edges, speed_edges, np.ma.masked_equal(counts.T, 0), cmap='Greens')
+        fig.colorbar(mesh, ax=ax, label='Pitches')
+    ax.set_title('Spin Rate vs Pitch Velocity')
+    ax.set_xlabel('Spin Rate (RPM)')
+    ax.set_ylabel('Velocity (MPH)')
+    ax.grid(True)
+
+
+METRIC_PLOTS = {
+    'Exit Velocity': _draw_exit_velocity,
+    'Spin Rate': _draw_spin_rate,
+}
+
+
+def render_metric_png(data: pd.DataFrame, metric: str, player_id=None) -> bytes:
+    """Render a metric chart to PNG bytes, cached per player, metric and data version.
+
+    Figures are created outside pyplot's global state and cleared once rendered, so
+    reruns do not accumulate open figures.
+    """
+    key = None if player_id is None else (player_id, metric, data_version(data))
+    if key is not None:
+        with _plot_cache_lock:
+            if key in _plot_cache:
+                tracing.count("cache_hits")
+                _plot_cache.move_to_end(key)
+                return _plot_cache[key]
+
+    fig = Figure(figsize=FIGSIZE)
+    try:
+        METRIC_PLOTS[metric](fig, data)
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', dpi=DPI)
+    finally:
+        fig.clear()
+    png = buffer.getvalue()
+
+    if key is not None:
+        with _plot_cache_lock:
+            _plot_cache[key] = png
+            while len(_plot_cache) > PLOT_CACHE_ENTRIES:
+                _plot_cache.popitem(last=False)
+    return png
@@ -0,0 +1,46 @@
+import os
+import sys
+import types
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import benchmark
+
+APP_MODULES = ["StatVision", "statcast_cache", "llm_client", "risk_store"]
+
+
+@pytest.fixture(scope="session")
+def app(tmp_path_factory):
+    """App modules imported against benchmark's local stand-ins for streamlit, statsapi, pybaseball and Vertex AI.
+
+    The stand-ins and every module imported with them are dropped from sys.modules again at
+    the end of the session, so tests that import the real libraries are not affected.
+    """
+    saved_modules = dict(sys.modules)
+    google = sys.modules.get("google")
+    saved_oauth2 = getattr(google, "oauth2", None)
+    saved_cache_dir = os.environ.get("STATVISION_CACHE_DIR")
+    saved_settings = dict(benchmark.settings)
+    os.environ["STATVISION_CACHE_DIR"] = str(tmp_path_factory.mktemp("statcast_cache"))
+    benchmark.install_fakes()
+    benchmark.settings.update(model_latency=0, source_latency=0)
+    try:
+        yield types.SimpleNamespace(**{name: __import__(name) for name in APP_MODULES})
+    finally:
+        benchmark.settings.update(saved_settings)
+        if saved_cache_dir is None:
+            os.environ.pop("STATVISION_CACHE_DIR", None)
+        else:
+            os.environ["STATVISION_CACHE_DIR"] = saved_cache_dir
+        if google is not None:
+            if saved_oauth2 is None:
+                google.__dict__.pop("oauth2", None)
+            else:
+                google.oauth2 = saved_oauth2
+        for name in set(sys.modules) - set(saved_modules):
+            del sys.modules[name]
+        sys.modules.update(saved_modules)
@@ -0,0 +1,18 @@
+import pandas as pd
+
+
+def test_nightly_due_is_the_latest_scheduled_hour(app):
+    hour = app.risk_store.NIGHTLY_HOUR_UTC
+    before = pd.Timestamp("2025-06-02", tz="UTC") + pd.Timedelta(hours=hour - 1)
+    after = before + pd.Timedelta(hours=2)
+    assert app.risk_store._nightly_due(before) == (before + pd.Timedelta(hours=1) - pd.Timedelta(days=1)).timestamp()
+    assert app.risk_store._nightly_due(after) == (after - pd.Timedelta(hours=1)).timestamp()
+
+
+def test_each_night_is_claimed_once(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(app.risk_store, "STORE_PATH", str(tmp_path / "risk_store.sqlite"))
+    now = pd.Timestamp.now(tz="UTC")
+    due = app.risk_store._nightly_due(now)
+    assert app.risk_store._claim_nightly_run(due)
+    assert not app.risk_store._claim_nightly_run(due)
+    assert app.risk_store._claim_nightly_run(pd.Timestamp.now(tz="UTC").timestamp() + 1)
@@ -0,0 +1,91 @@
+import time
+
+import pandas as pd
+import pytest
+
+DAY = pd.Timedelta(days=1)
+TODAY = pd.Timestamp.today().normalize()
+
+
+@pytest.fixture
+def cache(app, tmp_path, monkeypatch):
+    """statcast_cache on an empty directory, downloading from published {game day: pitches}.
+
+    Returns (module, published, calls), where calls records the (start, end) of every download.
+    """
+    published, calls = {}, []
+
+    def statcast_batter(start_dt, end_dt, player_id):
+        calls.append((pd.Timestamp(start_dt), pd.Timestamp(end_dt)))
+        days = [day for day in published if pd.Timestamp(start_dt) <= day <= pd.Timestamp(end_dt)]
+        return pd.DataFrame({
+            "game_date": [day.strftime("%Y-%m-%d") for day in days for _ in range(published[day])],
+            "launch_speed": [95.0 for day in days for _ in range(published[day])],
+        })
+
+    monkeypatch.setattr(app.statcast_cache, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(app.statcast_cache, "statcast_batter", statcast_batter)
+    return app.statcast_cache, published, calls
+
+
+def _entry(end, synced_at, start="2024-03-01"):
+    return {"start": start, "end": end.strftime("%Y-%m-%d"), "synced_at": synced_at}
+
+
+def test_unfinished_day_is_refetched_after_it_ends(app):
+    synced_last_night = (TODAY - DAY + pd.Timedelta(hours=20)).timestamp()
+    entry = _entry(TODAY - DAY, synced_last_night)
+    missing = app.statcast_cache._missing_ranges(entry, pd.Timestamp("2024-03-01"), TODAY)
+    assert missing == [(TODAY - DAY, TODAY)]
+
+
+def test_recent_sync_is_served_within_ttl(app):
+    entry = _entry(TODAY, time.time())
+    assert app.statcast_cache._missing_ranges(entry, pd.Timestamp("2024-03-01"), TODAY) == []
+
+
+def test_days_before_the_sync_day_are_final(app):
+    entry = _entry(pd.Timestamp("2024-09-29"), time.time() - 7 * 24 * 3600)
+    assert app.statcast_cache._missing_ranges(entry, pd.Timestamp("2024-03-01"), pd.Timestamp("2024-09-29")) == []
+    assert app.statcast_cache._missing_ranges(entry, pd.Timestamp("2024-02-01"), pd.Timestamp("2024-10-02")) == [
+        (pd.Timestamp("2024-02-01"), pd.Timestamp("2024-02-29")),
+        (pd.Timestamp("2024-09-30"), pd.Timestamp("2024-10-02")),
+    ]
+
+
+def test_nightly_sync_picks_up_games_published_after_it(cache):
+    statcast_cache, published, calls = cache
+    start = TODAY - 5 * DAY
+    published.update({start: 3, start + DAY: 2})
+    assert len(statcast_cache.load_statcast(7, start, TODAY, shard=None)) == 5
+
+    # Yesterday's games are published after that sync; served from the cache until the TTL passes
+    published[TODAY - DAY] = 4
+    calls.clear()
+    assert len(statcast_cache.load_statcast(7, start, TODAY, shard=None)) == 5
+    assert calls == []
+
+    # The next night's sync refetches the day it last synced, and nothing before it
+    manifest = statcast_cache._read_manifest()
+    manifest["7"]["synced_at"] -= 24 * 3600
+    statcast_cache._write_manifest(manifest)
+    data = statcast_cache.load_statcast(7, start, TODAY, shard=None)
+    assert calls == [(TODAY - DAY, TODAY)]
+    assert len(data) == 9
+    assert (data["game_date"] == TODAY - DAY).sum() == 4
+
+
+def test_refetch_replaces_rows_of_the_refetched_days(cache):
+    statcast_cache, published, calls = cache
+    start = TODAY - 3 * DAY
+    published.update({start: 2, TODAY: 1})
+    statcast_cache.load_statcast(7, start, TODAY, shard=None)
+
+    published[TODAY] = 6  # the rest of today's game
+    manifest = statcast_cache._read_manifest()
+    manifest["7"]["synced_at"] -= 2 * statcast_cache.TODAY_TTL
+    statcast_cache._write_manifest(manifest)
+    data = statcast_cache.load_statcast(7, start, TODAY, shard=None)
+    assert calls[-1][1] == TODAY
+    assert (data["game_date"] == TODAY).sum() == 6
+    assert len(data) == 8
@@ -0,0 +1,36 @@
+import json
+
+import pytest
+
+ROW = {
+    "identification_method": "Broadcast radar overlay",
+    "metric": "Pitch velocity",
+    "play_analysis": "Fastball up in the zone",
+    "source": "extra field the app does not show",
+    "timestamp_range": "00:00:10 - 00:00:13",
+    "value": "97.1 mph",
+}
+
+
+def test_streamed_rows_follow_analysis_columns(app):
+    text = json.dumps({"metrics": [ROW, ROW]})
+    rows, _ = app.StatVision._parse_completed_rows(text[:len(text) // 2 + 40], 0)
+    assert rows
+    assert list(rows[0]) == list(app.StatVision.ANALYSIS_COLUMNS)
+    assert rows[0]["timestamp_range"] == "00:00:10 - 00:00:13"
+
+
+def test_streamed_and_cached_rows_agree(app):
+    text = json.dumps({"metrics": [ROW], "players": ["Mike Trout"]})
+    streamed, _ = app.StatVision._parse_completed_rows(text, 0)
+    cached, players = app.StatVision.parse_structured_analysis(text)
+    assert [list(row.values()) for row in streamed] == cached.values.tolist()
+    assert cached.iloc[0, 0] == "00:00:10 - 00:00:13"
+    assert players == ["Mike Trout"]
+
+
+def test_row_missing_a_field_is_rejected(app):
+    row = dict(ROW)
+    del row["value"]
+    with pytest.raises(ValueError):
+        app.StatVision._parse_completed_rows(json.dumps({"metrics": [row]}), 0)
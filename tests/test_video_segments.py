@@ -0,0 +1,137 @@
+import os
+import struct
+
+import pytest
+
+import benchmark
+from video_segments import merge_segment_rows, segment_windows, shift_timestamps, video_duration
+
+
+def _row(timestamp_range, metric="Exit velocity", value="108.4 mph"):
+    return {"timestamp_range": timestamp_range, "metric": metric, "value": value,
+            "identification_method": "Statcast graphic", "play_analysis": "Line drive"}
+
+
+def _box(kind, body):
+    return struct.pack(">I4s", 8 + len(body), kind) + body
+
+
+def _mp4(seconds, timescale=1000, version=0):
+    if version == 1:
+        header = bytes([1, 0, 0, 0]) + struct.pack(">QQIQ", 0, 0, timescale, seconds * timescale)
+    else:
+        header = bytes(4) + struct.pack(">IIII", 0, 0, timescale, seconds * timescale)
+    return _box(b"ftyp", b"isom" + bytes(4)) + _box(b"moov", _box(b"mvhd", header + bytes(80)))
+
+
+class SpyModel(benchmark.FakeGenerativeModel):
+    """Fake model recording the video part of every request in parts"""
+
+    def __init__(self, model_name, parts, **kwargs):
+        super().__init__(model_name, **kwargs)
+        self.parts = parts
+
+    async def generate_content_async(self, contents, generation_config=None, safety_settings=None, stream=False):
+        self.parts.append(contents[0])
+        return await super().generate_content_async(contents, generation_config, safety_settings, stream)
+
+
+@pytest.fixture(scope="module")
+def spy_llm(app):
+    """One client for the module, answering from a SpyModel; yields (client, recorded parts)"""
+    parts = []
+    client = app.llm_client.LLMClient(lambda: SpyModel(app.StatVision.MODEL_NAME, parts), backoff_base=0)
+    yield client, parts
+    client.close()
+
+
+@pytest.fixture
+def analyze(app, spy_llm, monkeypatch):
+    """analyze_video_segmented on 120 second segments through the spy client; returns (call, recorded parts)"""
+    client, parts = spy_llm
+    parts.clear()
+    monkeypatch.setitem(benchmark.settings, "players", 2)
+
+    def call(path, duration_seconds=None):
+        return app.StatVision.analyze_video_segmented(str(path), duration_seconds, segment_seconds=120,
+                                                      overlap_seconds=10, llm=client)
+    return call, parts
+
+
+def test_segment_windows_overlap():
+    assert segment_windows(300, 120, 10) == [(0, 120), (110, 230), (220, 300)]
+
+
+def test_segment_windows_short_and_fractional():
+    assert segment_windows(45, 120, 10) == [(0, 45)]
+    assert segment_windows(120.4, 120, 10) == [(0, 120), (110, 121)]
+
+
+def test_segment_windows_rejects_overlap_as_long_as_segment():
+    with pytest.raises(ValueError):
+        segment_windows(300, 60, 60)
+
+
+def test_shift_timestamps():
+    assert shift_timestamps("00:01:05 - 00:01:09", 110) == "00:02:55 - 00:02:59"
+    assert shift_timestamps("01:05 - 01:09", 3600) == "01:01:05 - 01:01:09"
+    assert shift_timestamps("throughout the clip", 110) == "throughout the clip"
+
+
+def test_merge_segment_rows_drops_copies_from_overlap():
+    first = [_row("00:01:52 - 00:01:56"), _row("00:00:30 - 00:00:34", "Pitch velocity", "97.1 mph")]
+    second = [_row("00:00:03 - 00:00:07"), _row("00:00:40 - 00:00:44")]
+    merged = merge_segment_rows([(0, first), (110, second)])
+    assert [row["timestamp_range"] for row in merged] == [
+        "00:00:30 - 00:00:34", "00:01:52 - 00:01:56", "00:02:30 - 00:02:34"]
+
+
+def test_merge_segment_rows_keeps_distinct_and_untimed_rows():
+    first = [_row("00:01:52 - 00:01:56"), _row("whole play")]
+    second = [_row("00:00:03 - 00:00:07", value="101.2 mph")]
+    merged = merge_segment_rows([(0, first), (110, second)])
+    assert [(row["timestamp_range"], row["value"]) for row in merged] == [
+        ("00:01:52 - 00:01:56", "108.4 mph"), ("00:01:53 - 00:01:57", "101.2 mph"), ("whole play", "108.4 mph")]
+
+
+@pytest.mark.parametrize("version", [0, 1])
+def test_video_duration_reads_movie_header(tmp_path, version):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(_mp4(185, version=version))
+    assert video_duration(str(path)) == 185
+
+
+def test_video_duration_unreadable(tmp_path):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(os.urandom(1024))
+    assert video_duration(str(path)) is None
+    assert video_duration(str(tmp_path / "missing.mp4")) is None
+
+
+def test_analyze_video_segmented_local_file(tmp_path, analyze):
+    call, parts = analyze
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(_mp4(300))
+    metrics, player_names = call(path, duration_seconds=600)
+
+    offsets = sorted((part["video_metadata"]["start_offset"]["seconds"],
+                      part["video_metadata"]["end_offset"]["seconds"]) for part in parts)
+    assert offsets == [(0, 120), (110, 230), (220, 300)]  # the file's own length wins over the given one
+    assert all(part["inline_data"]["data"] == path.read_bytes() for part in parts)
+
+    names = benchmark.player_names(2)
+    assert player_names == names
+    expected = sorted(f"00:{(offset + delta) // 60:02d}:{(offset + delta) % 60:02d}"
+                      for offset in (0, 110, 220) for delta in (0, 4, 10, 14))
+    assert sorted(value.split(" - ")[0] for value in metrics.iloc[:, 0]) == expected
+
+
+def test_analyze_video_segmented_needs_length(tmp_path, analyze):
+    call, parts = analyze
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(os.urandom(1024))
+    with pytest.raises(ValueError):
+        call(path)
+    call(path, duration_seconds=100)
+    assert len(parts) == 1
+    assert parts[0]["video_metadata"]["end_offset"] == {"seconds": 100}
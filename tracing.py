@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import uuid
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+import pandas as pd
+import streamlit as st
+
+# Constants
+TRACE_LOG = os.environ.get("STATVISION_TRACE_LOG", os.path.join(
+    os.environ.get("STATVISION_CACHE_DIR", os.path.join(os.getcwd(), ".statcast_cache")), "traces.jsonl"))
+TRACE_LOG_MAX_BYTES = 50 * 1024 ** 2  # rotated to a single .1 backup past this size
+
+_current_trace = contextvars.ContextVar("statvision_trace", default=None)
+_current_span = contextvars.ContextVar("statvision_span", default=None)
+_log_lock = threading.Lock()
+
+
+class Span:
+    """One timed stage of a run, with attributes such as row counts and counters such as cache hits"""
+
+    def __init__(self, name: str, parent, attributes: dict):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.parent_id = parent.id if parent else None
+        self.depth = parent.depth + 1 if parent else 0
+        self.attributes = dict(attributes)
+        self.thread = threading.current_thread().name
+        self.start = time.perf_counter()
+        self.duration = None
+        self.error = None
+        self._lock = threading.Lock()
+
+    def set(self, **attributes):
+        with self._lock:
+            self.attributes.update(attributes)
+
+    def count(self, counter: str, amount: int = 1):
+        with self._lock:
+            self.attributes[counter] = self.attributes.get(counter, 0) + amount
+
+    def fail(self, error: BaseException):
+        self.error = f"{type(error).__name__}: {error}"
+
+    def to_dict(self, origin: float) -> dict:
+        return {
+            "span_id": self.id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "thread": self.thread,
+            "start_ms": round((self.start - origin) * 1000, 2),
+            "duration_ms": None if self.duration is None else round(self.duration * 1000, 2),
+            "error": self.error,
+            **self.attributes,
+        }
+
+
+class _NullSpan:
+    """Returned outside a traced run, so instrumented code works unchanged in scripts and benchmarks"""
+
+    def set(self, **attributes):
+        pass
+
+    def count(self, counter: str, amount: int = 1):
+        pass
+
+    def fail(self, error: BaseException):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Trace:
+    """Every span recorded while serving one page run, across all threads it fanned out to"""
+
+    def __init__(self, name: str):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.started_at = time.time()
+        self.origin = time.perf_counter()
+        self.duration = None
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            spans = list(self.spans)
+        return {
+            "trace_id": self.id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": None if self.duration is None else round(self.duration * 1000, 2),
+            "spans": [span.to_dict(self.origin) for span in spans],
+        }
+
+    def to_frame(self) -> pd.DataFrame:
+        """One row per span in start order, with stage names indented by nesting depth"""
+        with self._lock:
+            spans = list(self.spans)
+        rows = []
+        for span in spans:
+            row = span.to_dict(self.origin)
+            row["name"] = "  " * span.depth + span.name
+            rows.append(row)
+        frame = pd.DataFrame(rows).drop(columns=["span_id", "parent_id"])
+        return frame.rename(columns={"name": "Stage", "start_ms": "Start (ms)", "duration_ms": "Duration (ms)"})
+
+
+def current_span():
+    """The innermost open span of the current run, or a no-op span outside a run"""
+    return _current_span.get() or _NULL_SPAN
+
+
+def count(counter: str, amount: int = 1):
+    """Add to a counter (cache_hits, retries, ...) of the innermost open span"""
+    current_span().count(counter, amount)
+
+
+def record_error(error: BaseException):
+    """Mark the innermost open span as failed, for errors the caller handles instead of raising"""
+    current_span().fail(error)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a stage of the current run; yields the span so callers can record row counts"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield _NULL_SPAN
+        return
+
+    current = Span(name, _current_span.get(), attributes)
+    trace.add(current)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.fail(e)
+        raise
+    finally:
+        current.duration = time.perf_counter() - current.start
+        _current_span.reset(token)
+
+
+def _row_count(result):
+    if hasattr(result, "shape"):
+        return result.shape[0]
+    if isinstance(result, list):
+        return len(result)
+    return None
+
+
+def traced(name: str):
+    """Decorator recording each call as a span, with the row count of DataFrame and list results"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name) as stage:
+                result = fn(*args, **kwargs)
+                rows = _row_count(result)
+                if rows is not None:
+                    stage.set(rows=rows)
+                return result
+        return wrapper
+    return decorator
+
+
+def propagate(fn):
+    """Bind fn to the caller's trace context, so spans opened on a pool thread join the caller's run.
+
+    Take a fresh binding for every submit; one binding cannot run on two threads at once.
+    """
+    return functools.partial(contextvars.copy_context().run, fn)
+
+
+def export(trace: Trace, path: str = TRACE_LOG):
+    """Append a finished run to the JSONL trace log; logging never fails the page"""
+    line = json.dumps(trace.to_dict(), default=str)
+    try:
+        with _log_lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if os.path.exists(path) and os.path.getsize(path) > TRACE_LOG_MAX_BYTES:
+                os.replace(path, f"{path}.1")
+            with open(path, "a") as f:
+                f.write(line + "\n")
+    except OSError:
+        pass
+
+
+@contextmanager
+def trace_run(name: str):
+    """Collect the spans of one page run under a root span, then export them"""
+    trace = Trace(name)
+    token = _current_trace.set(trace)
+    try:
+        with span(name):
+            yield trace
+    finally:
+        trace.duration = time.perf_counter() - trace.origin
+        _current_trace.reset(token)
+        export(trace)
+
+
+def display_trace_panel(trace: Trace):
+    """Sidebar breakdown of where the time of the current run went"""
+    with st.sidebar.expander("⏱️ Performance", expanded=True):
+        st.caption(f"Run {trace.id[:8]} · {trace.duration * 1000:.0f} ms total")
+        if trace.spans:
+            st.dataframe(trace.to_frame(), hide_index=True)
@@ -0,0 +1,132 @@
+import re
+import struct
+
+# Constants
+SEGMENT_SECONDS = 120
+SEGMENT_OVERLAP = 10  # seconds shared by neighbouring segments, so plays on a boundary are seen whole once
+DEDUP_TOLERANCE = 3  # seconds between start times of rows treated as the same occurrence
+TIMESTAMP_PATTERN = re.compile(r"\b(\d{1,2}):(\d{2})(?::(\d{2}))?\b")
+MP4_CONTAINERS = {b"moov"}  # boxes searched for the movie header that holds the duration
+
+
+def segment_windows(duration: float, segment_seconds: int = SEGMENT_SECONDS, overlap: int = SEGMENT_OVERLAP):
+    """Split [0, duration] seconds into (start, end) windows, each overlapping the previous one"""
+    if overlap >= segment_seconds:
+        raise ValueError("Segment overlap must be shorter than the segment")
+    duration = int(-(-duration // 1))
+    windows = []
+    start = 0
+    while True:
+        end = min(start + segment_seconds, duration)
+        windows.append((start, end))
+        if end >= duration:
+            return windows
+        start = end - overlap
+
+
+def _boxes(f, end: int):
+    """Yield (type, body start, box end) of the MP4 boxes between the file position and end"""
+    while f.tell() + 8 <= end:
+        start = f.tell()
+        size, kind = struct.unpack(">I4s", f.read(8))
+        header = 8
+        if size == 1:  # 64-bit size follows the type
+            size, header = struct.unpack(">Q", f.read(8))[0], 16
+        elif size == 0:  # box runs to the end of its parent
+            size = end - start
+        if size < header:
+            raise ValueError(f"Invalid MP4 box size at byte {start}")
+        yield kind, start + header, start + size
+        f.seek(start + size)
+
+
+def _movie_duration(f, end: int):
+    for kind, body, box_end in _boxes(f, end):
+        if kind in MP4_CONTAINERS:
+            f.seek(body)
+            return _movie_duration(f, box_end)
+        if kind == b"mvhd":
+            f.seek(body)
+            version = f.read(4)[0]  # version byte and three flag bytes
+            if version == 1:
+                f.seek(16, 1)  # 64-bit creation and modification times
+                timescale, duration = struct.unpack(">IQ", f.read(12))
+            else:
+                f.seek(8, 1)
+                timescale, duration = struct.unpack(">II", f.read(8))
+            return duration / timescale if timescale else None
+    return None
+
+
+def video_duration(path: str):
+    """Length in seconds of a local MP4 or QuickTime file, read from its movie header, or None when unreadable"""
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, 2)
+            end = f.tell()
+            f.seek(0)
+            return _movie_duration(f, end)
+    except (OSError, ValueError, IndexError, struct.error):
+        return None
+
+
+def _seconds(match) -> int:
+    first, second, third = match.groups()
+    if third is None:  # MM:SS
+        return int(first) * 60 + int(second)
+    return int(first) * 3600 + int(second) * 60 + int(third)
+
+
+def format_timestamp(seconds: int) -> str:
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def parse_start(timestamp_range: str):
+    """Start of a "HH:MM:SS - HH:MM:SS" range in seconds, or None when it has no timestamp"""
+    match = TIMESTAMP_PATTERN.search(timestamp_range)
+    return _seconds(match) if match else None
+
+
+def shift_timestamps(timestamp_range: str, offset: int) -> str:
+    """Move every timestamp of a segment-relative range by the segment's start offset"""
+    return TIMESTAMP_PATTERN.sub(lambda match: format_timestamp(_seconds(match) + offset), timestamp_range)
+
+
+def _dedup_key(row) -> tuple:
+    return row["metric"].strip().lower(), " ".join(row["value"].lower().split())
+
+
+def merge_segment_rows(segments, tolerance: int = DEDUP_TOLERANCE):
+    """Merge (offset, rows) segment results into one timeline of video-relative rows.
+
+    Rows with the same metric and value starting within tolerance seconds are one
+    occurrence seen by two overlapping segments; the earliest copy is kept. Rows without
+    a readable timestamp are kept as they are, after the timed rows.
+    """
+    timed, untimed = [], []
+    for offset, rows in segments:
+        for row in rows:
+            row = dict(row, timestamp_range=shift_timestamps(row["timestamp_range"], offset))
+            start = parse_start(row["timestamp_range"])
+            (untimed if start is None else timed).append((start, row))
+
+    merged = []
+    last_start = {}
+    for start, row in sorted(timed, key=lambda item: item[0]):
+        key = _dedup_key(row)
+        if key in last_start and start - last_start[key] <= tolerance:
+            continue
+        last_start[key] = start
+        merged.append(row)
+    return merged + [row for _, row in untimed]
+
+
+def merge_player_names(name_lists):
+    """Union of the players named by each segment, in first-seen order, ignoring case"""
+    seen, names = set(), []
+    for name_list in name_lists:
+        for name in name_list:
+            if name.lower() not in seen:
+                seen.add(name.lower())
+                names.append(name)
+    return names